@@ -0,0 +1,30 @@
+"""Helpers shared by the benchmark scripts in this directory."""
+
+import importlib.util
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def load_splitwise():
+    """Import the repository root as the ``splitwise`` package."""
+    if "splitwise" not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            "splitwise", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["splitwise"] = module
+        spec.loader.exec_module(module)
+    return sys.modules["splitwise"]
+
+
+def best_of(repeat, function, *args):
+    """Best wall time of ``repeat`` calls in milliseconds, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
@@ -0,0 +1,130 @@
+"""Benchmark debt simplification and the balance reads that feed it.
+
+Run from the repository root::
+
+    python bench/settlements.py --users 100000
+
+Random zero-sum balances are settled with ``simplify_debts`` at a few sizes,
+then an in-memory SQLite database is seeded with ``--transactions`` payments
+and settled from the ``balances`` table and from aggregated transactions.
+"""
+
+import argparse
+import collections
+import datetime
+import random
+
+from common import best_of, load_splitwise
+
+splitwise = load_splitwise()
+
+from splitwise import create_app  # noqa: E402
+from splitwise.models import db, User, UserBalance, UserTransaction  # noqa: E402
+from splitwise.services import (  # noqa: E402
+    balances_from_table,
+    balances_from_transactions,
+    simplify_debts,
+)
+
+
+def random_balances(users, rnd):
+    """Zero-sum balances in cents for ``users`` users."""
+    balances = {user_id: rnd.randint(-100000, 100000) for user_id in range(1, users)}
+    balances[users] = -sum(balances.values())
+    return balances
+
+
+def check_settles(balances, transfers):
+    remaining = collections.Counter(balances)
+    for debtor_id, creditor_id, amount in transfers:
+        remaining[debtor_id] += amount
+        remaining[creditor_id] -= amount
+    assert not any(remaining.values()), "transfers do not settle the balances"
+    assert len(transfers) < len(balances)
+
+
+def bench_simplify(users, repeat, rnd):
+    print("simplify_debts")
+    size = 1000
+    while size <= users:
+        balances = random_balances(size, rnd)
+        ms, transfers = best_of(repeat, simplify_debts, balances)
+        check_settles(balances, transfers)
+        print(f"  {size:>9} users  {ms:9.1f} ms  {len(transfers)} transfers")
+        size *= 10
+
+
+def seed(users, transactions, rnd):
+    db.session.execute(
+        User.__table__.insert(),
+        [
+            dict(
+                id=user_id,
+                username=f"user{user_id}",
+                name=f"User {user_id}",
+                email=f"user{user_id}@example.com",
+                mobile_number="9999999999",
+                hashed_password="-",
+                session_epoch=0,
+            )
+            for user_id in range(1, users + 1)
+        ],
+    )
+    balances = collections.Counter()
+    rows = []
+    for _ in range(transactions):
+        payer_id, recipient_id = rnd.sample(range(1, users + 1), 2)
+        amount = rnd.randint(1, 100000)
+        balances[payer_id] += amount
+        balances[recipient_id] -= amount
+        rows.append(
+            dict(
+                payer_id=payer_id,
+                recipient_id=recipient_id,
+                amount=amount,
+                description="bench",
+                created_at=datetime.date(2024, 1, 1),
+            )
+        )
+    db.session.execute(UserTransaction.__table__.insert(), rows)
+    db.session.execute(
+        UserBalance.__table__.insert(),
+        [
+            dict(user_id=user_id, balance=balance)
+            for user_id, balance in balances.items()
+        ],
+    )
+    db.session.commit()
+
+
+def bench_database(users, transactions, repeat, rnd):
+    print(f"settle up from SQLite, {users} users, {transactions} transactions")
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        seed(users, transactions, rnd)
+        for label, load in (
+            ("balances table", balances_from_table),
+            ("transactions", balances_from_transactions),
+        ):
+            ms, balances = best_of(repeat, load)
+            settle_ms, transfers = best_of(repeat, simplify_debts, balances)
+            check_settles(balances, transfers)
+            print(f"  {label:<15} load {ms:8.1f} ms  simplify {settle_ms:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--transactions", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    bench_simplify(args.users, args.repeat, rnd)
+    bench_database(min(args.users, 10000), args.transactions, args.repeat, rnd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark the split engine: one call per expense against the batch modes.
+
+Run from the repository root::
+
+    python bench/splits.py --count 20000
+
+Times ``compute_shares`` called once per split, ``compute_shares_batch``
+without NumPy, and ``compute_shares_batch`` with NumPy when it is installed,
+over the same random mix of EQUAL, PERCENTAGE and EXACT splits. All three are
+checked to give identical shares.
+"""
+
+import argparse
+import random
+
+from common import best_of, load_splitwise
+
+load_splitwise()
+
+from splitwise.models.money import allocate  # noqa: E402
+from splitwise.services import splits  # noqa: E402
+from splitwise.services.splits import (  # noqa: E402
+    InvalidSplit,
+    compute_shares,
+    compute_shares_batch,
+)
+
+
+def random_splits(count, rnd):
+    """Mixed splits as bulk import sees them, one in ten invalid."""
+    result = []
+    for _ in range(count):
+        split_type = rnd.choice(["EQUAL", "PERCENTAGE", "EXACT"])
+        members = rnd.randint(1, 8)
+        amount = rnd.randint(1, 10**7)
+        owed_by = rnd.sample(range(1, 1000), members)
+        if split_type == "EQUAL":
+            result.append((split_type, amount, owed_by, None))
+            continue
+        if split_type == "PERCENTAGE":
+            cuts = sorted(rnd.randint(0, 10000) for _ in range(members - 1))
+            values = [(b - a) / 100 for a, b in zip([0] + cuts, cuts + [10000])]
+        else:
+            parts = allocate(amount, [rnd.randint(1, 5) for _ in range(members)])
+            values = [part / 100 for part in parts]
+        if rnd.random() < 0.1:
+            values[0] += 1
+        result.append((split_type, amount, owed_by, values))
+    return result
+
+
+def one_by_one(batch):
+    results = []
+    for split in batch:
+        try:
+            results.append(compute_shares(*split))
+        except InvalidSplit as e:
+            results.append(e)
+    return results
+
+
+def normalized(results):
+    return [
+        "error"
+        if isinstance(result, InvalidSplit)
+        else [(user_id, int(share)) for user_id, share in result]
+        for result in results
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    batch = random_splits(args.count, random.Random(args.seed))
+    numpy = splits.np
+
+    ms, expected = best_of(args.repeat, one_by_one, batch)
+    expected = normalized(expected)
+    print(f"{args.count} splits")
+    print(f"  compute_shares per split  {ms:8.1f} ms")
+
+    splits.np = None
+    ms, results = best_of(args.repeat, compute_shares_batch, batch)
+    assert normalized(results) == expected, "scalar batch differs"
+    print(f"  batch, scalar             {ms:8.1f} ms")
+
+    splits.np = numpy
+    if numpy is None:
+        print("  batch, NumPy              skipped, numpy is not installed")
+        return
+    ms, results = best_of(args.repeat, compute_shares_batch, batch)
+    assert normalized(results) == expected, "vectorized batch differs"
+    print(f"  batch, NumPy              {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
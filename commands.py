@@ -0,0 +1,110 @@
+import datetime
+
+import click
+from flask import Flask
+
+from .models import db
+from .services import (
+    Worker,
+    backfill_rollups,
+    materialize_due,
+    purge_idempotency_keys,
+    rebuild_search_index,
+    reconcile_balances,
+    take_snapshots,
+)
+
+
+def register_commands(app: Flask):
+    @app.cli.command("init-db")
+    def init_db():
+        """Create all database tables."""
+        db.create_all()
+        db.session.commit()
+        click.echo("Database initialised")
+
+    @app.cli.command("snapshot-balances")
+    @click.option(
+        "--min-tail",
+        default=100,
+        show_default=True,
+        help="Only snapshot users with at least this many new ledger entries.",
+    )
+    def snapshot_balances(min_tail):
+        """Snapshot user balances so balance reads replay a short tail."""
+        click.echo(f"{take_snapshots(min_tail)} balance snapshots written")
+
+    @app.cli.command("reconcile-balances")
+    @click.option("--chunk-size", default=10000, show_default=True)
+    @click.option(
+        "--dry-run", is_flag=True, help="Report drifted balances without fixing them."
+    )
+    def reconcile(chunk_size, dry_run):
+        """Recompute balances from transactions and repair the ones that drifted."""
+        checked, repaired = reconcile_balances(
+            chunk_size,
+            dry_run,
+            progress=lambda checked, repaired: click.echo(
+                f"checked {checked} users, {repaired} drifted"
+            ),
+        )
+        verb = "found" if dry_run else "repaired"
+        click.echo(f"Done: checked {checked} users, {verb} {repaired} balances")
+
+    @app.cli.command("purge-idempotency-keys")
+    @click.option(
+        "--max-age-hours",
+        default=None,
+        type=int,
+        help="Defaults to IDEMPOTENCY_KEY_TTL_HOURS.",
+    )
+    def purge_keys(max_age_hours):
+        """Delete stored Idempotency-Key responses past their retention."""
+        if max_age_hours is None:
+            max_age_hours = app.config.get("IDEMPOTENCY_KEY_TTL_HOURS", 24)
+        deleted = purge_idempotency_keys(datetime.timedelta(hours=max_age_hours))
+        click.echo(f"{deleted} idempotency keys deleted")
+
+    @app.cli.command("backfill-rollups")
+    @click.option("--chunk-size", default=10000, show_default=True)
+    def backfill(chunk_size):
+        """Rebuild the spending analytics rollups from existing expenses."""
+        replayed = backfill_rollups(
+            chunk_size,
+            progress=lambda replayed: click.echo(f"{replayed} expenses replayed"),
+        )
+        click.echo(f"Done: rolled up {replayed} expenses")
+
+    @app.cli.command("run-worker")
+    @click.option("--once", is_flag=True, help="Run one batch of due jobs and exit.")
+    @click.option("--poll-interval", default=1.0, show_default=True)
+    def run_worker(once, poll_interval):
+        """Run queued background jobs, such as deferred expense fan-out."""
+        worker = Worker(
+            batch_size=app.config.get("JOB_BATCH_SIZE", 100),
+            lease=app.config.get("JOB_LEASE_SECONDS", 300),
+            max_attempts=app.config.get("JOB_MAX_ATTEMPTS", 5),
+        )
+        if once:
+            succeeded, failed = worker.run_once()
+            click.echo(f"{succeeded} jobs done, {failed} failed")
+        else:
+            worker.run_forever(poll_interval)
+
+    @app.cli.command("run-recurring")
+    @click.option("--batch-size", default=500, show_default=True)
+    def run_recurring(batch_size):
+        """Create the expenses of every recurring expense due today or earlier."""
+        created, skipped = materialize_due(
+            batch_size=batch_size,
+            progress=lambda created, skipped: click.echo(
+                f"{created} expenses created, {skipped} skipped"
+            ),
+        )
+        click.echo(f"Done: created {created} expenses, skipped {skipped}")
+
+    @app.cli.command("build-search-index")
+    def build_search_index():
+        """Create and fill the expense search index of an existing database."""
+        rebuild_search_index()
+        click.echo("Search index built")
@@ -9,5 +9,4 @@ docs = FlaskApiSpec()
 ma = Marshmallow()
 login = LoginManager()
 login.session_protection = "strong"
-login.login_view = "login"
 login.login_message_category = "info"
@@ -1,20 +1,65 @@
-import time
+import datetime
+import logging
 from . import api, ma
-from flask import Blueprint, jsonify
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
 
 from marshmallow import Schema, fields
+from sqlalchemy.orm import joinedload, selectinload
 from flask_restful import Resource, Api
 from flask_apispec.views import MethodResource
 from flask_apispec import marshal_with, doc, use_kwargs
 from flask_login import current_user, login_user, logout_user, login_required
 
-from ..models import db, User, UserBalance, UserTransaction, Expense
+from ..models import (
+    db,
+    User,
+    UserTransaction,
+    Expense,
+    PairwiseBalance,
+    LedgerEntry,
+)
+from ..models.money import MAX_AMOUNT, from_cents, to_cents
 from ..controller import api, ma, docs, login
+from ..services import (
+    InvalidCursor,
+    InvalidGroup,
+    InvalidSplit,
+    apply_transfers,
+    balance_key,
+    check_group_members,
+    balances_from_table,
+    cache,
+    balances_from_transactions,
+    delete_expense,
+    expense_list_key,
+    export_ledger,
+    fast_response,
+    idempotent,
+    import_expenses,
+    load_identity,
+    ingest_expense,
+    iter_csv,
+    iter_jsonl,
+    ledger_balance,
+    metrics,
+    paginate_keyset,
+    simplify_debts,
+    spending_summary,
+)
+
+logger = logging.getLogger(__name__)
 
 
 @login.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return load_identity(user_id)
 
 
 class APIResponse(Schema):
@@ -22,10 +67,14 @@ class APIResponse(Schema):
     data = fields.Dict(default={})
 
 
+api_response = APIResponse()
+
+
 class UserTransactionSchema(ma.Schema):
     recipient_id = fields.Int(required=True)
-    amount = fields.Float(required=True)
+    amount = fields.Float(required=True, validate=fields.validate.Range(max=MAX_AMOUNT))
     description = fields.Str(required=True)
+    group_id = fields.Int(required=False)
 
 
 class ExpenseSchema(ma.Schema):
@@ -35,7 +84,7 @@ class ExpenseSchema(ma.Schema):
 
 
 class CreateExpenseRequest(ma.Schema):
-    amount = fields.Float(required=True)
+    amount = fields.Float(required=True, validate=fields.validate.Range(max=MAX_AMOUNT))
     description = fields.Str(required=True)
     category = fields.Str(required=True)
     split_type = fields.Str(
@@ -43,6 +92,51 @@ class CreateExpenseRequest(ma.Schema):
     )
     owed_by = fields.List(fields.Int(), required=True)
     split_values = fields.List(fields.Float(), required=False)
+    group_id = fields.Int(required=False)
+
+
+class ImportExpenseRequest(CreateExpenseRequest):
+    date = fields.Date(required=False)
+
+
+import_expense_request = ImportExpenseRequest()
+
+
+DEFAULT_PAGE_SIZE = 50
+
+
+class ListTransactionsRequest(ma.Schema):
+    cursor = fields.Str(required=False)
+    limit = fields.Int(
+        missing=DEFAULT_PAGE_SIZE, validate=fields.validate.Range(min=1, max=200)
+    )
+    from_date = fields.Date(required=False, data_key="from")
+    to_date = fields.Date(required=False, data_key="to")
+
+
+class ListExpensesRequest(ListTransactionsRequest):
+    category = fields.Str(required=False)
+
+
+class ExportRequest(ma.Schema):
+    format = fields.Str(
+        missing="csv", validate=fields.validate.OneOf(["csv", "jsonl"])
+    )
+
+
+class AnalyticsRequest(ma.Schema):
+    group_by = fields.Str(
+        missing="category", validate=fields.validate.OneOf(["category", "month"])
+    )
+    from_date = fields.Date(required=False, data_key="from")
+    to_date = fields.Date(required=False, data_key="to")
+
+
+class SettlementRequest(ma.Schema):
+    source = fields.Str(
+        missing="balances",
+        validate=fields.validate.OneOf(["balances", "transactions"]),
+    )
 
 
 expense_routes = Blueprint("expense_routes", __name__, url_prefix="/api/")
@@ -50,201 +144,171 @@ expense_routes = Blueprint("expense_routes", __name__, url_prefix="/api/")
 
 class ExpenseAPI(MethodResource, Resource):
     @doc(description="Create Expense API", tags=["Create Expense API"])
-    @use_kwargs(ExpenseSchema, location=("json"))
-    @marshal_with(APIResponse)  # marshalling
+    @use_kwargs(CreateExpenseRequest, location=("json"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    @idempotent
     def post(self, **kwargs):
         try:
-            current_user_id = current_user.get_id()
-
-            expense = Expense()
-            expense.paid_by = current_user_id
-            expense.amount = kwargs["amount"]
-            expense.description = kwargs["description"]
-            expense.category = kwargs["category"]
-            expense.split_type = kwargs["split_type"]
-            expense.date = time.strftime("%Y-%m-%d")
-
-            if expense.split_type == "EQUAL":
-                share_amount = expense.amount / (len(kwargs["owed_by"]) + 1)
-
-                user_balance = UserBalance.query.filter_by(
-                    user_id=current_user_id
-                ).first()
-                if not user_balance:
-                    user_balance = UserBalance()
-                    user_balance.user_id = current_user_id
-                    user_balance.balance = 0
-
-                user_balance.balance += expense.amount - share_amount
-                db.session.add(user_balance)
-                db.session.commit()
-
-                for user_id in kwargs["owed_by"]:
-                    expense.owed_by.append(user_id)
-
-                    user_balance = UserBalance.query.filter_by(user_id=user_id).first()
-                    if not user_balance:
-                        user_balance = UserBalance()
-                        user_balance.user_id = user_id
-                        user_balance.balance = 0
-
-                    user_transaction = UserTransaction()
-                    user_transaction.payer_id = current_user_id
-                    user_transaction.recipient_id = user_id
-                    user_transaction.expense_id = expense.id
-                    user_transaction.amount = share_amount
-                    user_transaction.description = expense.description
-                    user_transaction.created_at = time.strftime("%Y-%m-%d")
-
-                    user_balance.balance -= share_amount
-                    db.session.add(user_transaction)
-                    db.session.add(user_balance)
-                    db.session.commit()
-
-            elif expense.split_type == "PERCENTAGE":
-                if sum(kwargs["split_values"]) != 100:
-                    return APIResponse().dump(dict(message="Invalid split values")), 400
-
-                for user_id, percentage in zip(
-                    kwargs["owed_by"], kwargs["split_values"]
-                ):
-                    expense.owed_by.append(user_id)
-
-                    user_balance = UserBalance.query.filter_by(user_id=user_id).first()
-
-                    if not user_balance:
-                        user_balance = UserBalance()
-                        user_balance.user_id = user_id
-                        user_balance.balance = 0
-
-                    expense_amount = expense.amount * percentage / 100
-
-                    user_transaction = UserTransaction()
-                    user_transaction.payer_id = current_user_id
-                    user_transaction.recipient_id = user_id
-                    user_transaction.expense_id = expense.id
-                    user_transaction.amount = expense_amount
-                    user_transaction.description = expense.description
-                    user_transaction.created_at = time.strftime("%Y-%m-%d")
-
-                    if user_id == current_user_id:
-                        user_balance.balance += expense_amount
-                    else:
-                        user_balance.balance -= expense_amount
-
-                    db.session.add(user_transaction)
-                    db.session.add(user_balance)
-                    db.session.commit()
-
-            elif expense.split_type == "EXACT":
-                if sum(kwargs["split_values"]) != expense.amount:
-                    return APIResponse().dump(dict(message="Invalid split values")), 400
-
-                for user_id, amount in zip(kwargs["owed_by"], kwargs["split_values"]):
-                    expense.owed_by.append(user_id)
-
-                    user_balance = UserBalance.query.filter_by(user_id=user_id).first()
-                    if not user_balance:
-                        user_balance = UserBalance()
-                        user_balance.user_id = user_id
-                        user_balance.balance = 0
-
-                    user_transaction = UserTransaction()
-                    user_transaction.payer_id = current_user_id
-                    user_transaction.recipient_id = user_id
-                    user_transaction.expense_id = expense.id
-                    user_transaction.amount = amount
-                    user_transaction.description = expense.description
-                    user_transaction.created_at = time.strftime("%Y-%m-%d")
-
-                    if user_id == current_user_id:
-                        user_balance.balance += amount
-                    else:
-                        user_balance.balance -= amount
-
-                    db.session.add(user_transaction)
-                    db.session.add(user_balance)
-                    db.session.commit()
-
-            db.session.add(expense)
-            db.session.commit()
-            return APIResponse().dump(
-                {"message": "Expense created successfully", "data": expense.to_dict()},
+            # @idempotent commits the expense together with the stored response
+            expense = ingest_expense(
+                current_user.id,
+                defer=current_app.config.get("DEFER_EXPENSE_FANOUT", False),
+                commit=False,
+                **kwargs,
+            )
+            return (
+                api_response.dump(
+                    {
+                        "message": "Expense created successfully",
+                        "data": expense.to_dict(),
+                    }
+                ),
                 200,
             )
+        except (InvalidSplit, InvalidGroup) as e:
+            return api_response.dump(dict(message=str(e))), 400
         except Exception as e:
-            return APIResponse().dump(dict(message=str(e))), 500
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
 
     @doc(description="Get Expense API", tags=["Get Expense API"])
-    @marshal_with(APIResponse)  # marshalling
-    @login.user_loader
-    def get(self):
+    @use_kwargs(ListExpensesRequest, location=("query"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, **kwargs):
         try:
-            expenses = Expense.query.filter_by(paid_by=current_user.get_id()).all()
-            return APIResponse().dump(
-                dict(
-                    message="Expenses fetched successfully",
-                    data=[expense.to_dict() for expense in expenses],
+            user_id = current_user.id
+            query = Expense.query.filter_by(paid_by=user_id)
+            if kwargs == dict(limit=DEFAULT_PAGE_SIZE):
+                # only the unfiltered first page is cached, which is what
+                # clients poll and what write paths can invalidate precisely
+                data = cache.get_or_load(
+                    expense_list_key(user_id),
+                    lambda: self.expense_page(query, **kwargs),
                 )
-            )
+            else:
+                data = self.expense_page(query, **kwargs)
+
+            return fast_response("Expenses fetched successfully", data)
+        except InvalidCursor as e:
+            return api_response.dump(dict(message=str(e))), 400
         except Exception as e:
-            return APIResponse().dump(dict(message=str(e))), 500
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+    @staticmethod
+    def expense_page(query, **kwargs):
+        query = query.options(selectinload(Expense.owed_by))
+        if kwargs.get("category"):
+            query = query.filter_by(category=kwargs["category"])
+        if kwargs.get("from_date"):
+            query = query.filter(Expense.date >= kwargs["from_date"])
+        if kwargs.get("to_date"):
+            query = query.filter(Expense.date <= kwargs["to_date"])
+
+        expenses, next_cursor = paginate_keyset(
+            query, Expense.date, Expense.id, kwargs.get("cursor"), kwargs["limit"]
+        )
+        return dict(
+            expenses=[expense.to_dict() for expense in expenses],
+            next_cursor=next_cursor,
+        )
+
 
 api.add_resource(ExpenseAPI, "/expenses")
 docs.register(ExpenseAPI)
 
 
+class BulkExpenseAPI(MethodResource, Resource):
+    @doc(
+        description="Bulk Import Expenses API, body is JSONL or CSV (text/csv)",
+        tags=["Bulk Import Expenses API"],
+    )
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def post(self):
+        try:
+            if request.mimetype in ("text/csv", "application/csv"):
+                records = iter_csv(request.stream)
+            else:
+                records = iter_jsonl(request.stream)
+
+            report = import_expenses(
+                current_user.id,
+                records,
+                import_expense_request.load,
+                batch_size=current_app.config.get("BULK_IMPORT_BATCH_SIZE", 500),
+            )
+            return (
+                api_response.dump(
+                    dict(
+                        message="Expenses imported successfully",
+                        data=report.to_dict(),
+                    )
+                ),
+                200,
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(BulkExpenseAPI, "/expenses/bulk")
+docs.register(BulkExpenseAPI)
+
+
 class ExpenseDetailsAPI(MethodResource, Resource):
     @doc(description="Get Expense Details API", tags=["Get Expense Details API"])
-    @marshal_with(APIResponse)  # marshalling
-    @login.user_loader
+    @marshal_with(api_response)  # marshalling
+    @login_required
     def get(self, expense_id):
         try:
             expense = Expense.query.filter_by(id=expense_id).first()
             if not expense:
                 return (
-                    APIResponse().dump(dict(message="Expense not found")),
+                    api_response.dump(dict(message="Expense not found")),
                     404,
                 )
 
-            if current_user.get_id() != expense.paid_by:
+            if current_user.id != expense.paid_by:
                 return (
-                    APIResponse().dump(dict(message="You are not allowed to view")),
+                    api_response.dump(dict(message="You are not allowed to view")),
                     403,
                 )
 
-            return APIResponse().dump(
+            return api_response.dump(
                 dict(
                     message="Expense fetched successfully",
                     data=expense.to_dict(),
                 )
             )
         except Exception as e:
-            return APIResponse().dump(dict(message=str(e))), 500
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
 
     @doc(description="Delete Expense API", tags=["Delete Expense API"])
-    @marshal_with(APIResponse)  # marshalling
-    @login.user_loader
+    @marshal_with(api_response)  # marshalling
+    @login_required
     def delete(self, expense_id):
         try:
             expense = Expense.query.filter_by(id=expense_id).first()
             if not expense:
                 return (
-                    APIResponse().dump(dict(message="Expense not found")),
+                    api_response.dump(dict(message="Expense not found")),
                     404,
                 )
 
-            if current_user.get_id() != expense.paid_by:
+            if current_user.id != expense.paid_by:
                 return (
-                    APIResponse().dump(dict(message="You are not allowed to delete")),
+                    api_response.dump(dict(message="You are not allowed to delete")),
                     403,
                 )
 
-            db.session.delete(expense)
-            db.session.commit()
+            delete_expense(expense)
 
             return (
-                APIResponse().dump(
+                api_response.dump(
                     dict(
                         message="Expense deleted successfully",
                     )
@@ -252,7 +316,8 @@ class ExpenseDetailsAPI(MethodResource, Resource):
                 200,
             )
         except Exception as e:
-            return APIResponse().dump(dict(message=str(e))), 500
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
 
 
 api.add_resource(ExpenseDetailsAPI, "/expenses/<int:expense_id>")
@@ -261,24 +326,44 @@ docs.register(ExpenseDetailsAPI)
 
 class UserTransactionsAPI(MethodResource, Resource):
     @doc(description="Get User Transactions API", tags=["Get User Transactions API"])
-    @marshal_with(APIResponse)  # marshalling
-    @login.user_loader
-    def get(self):
+    @use_kwargs(ListTransactionsRequest, location=("query"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, **kwargs):
         try:
-            user_transactions = UserTransaction.query.filter_by(
-                recipient_id=current_user.get_id()
-            ).all()
-            return APIResponse().dump(
+            query = UserTransaction.query.filter_by(
+                recipient_id=current_user.id
+            ).options(
+                joinedload(UserTransaction.paid_by),
+                joinedload(UserTransaction.paid_to),
+            )
+            if kwargs.get("from_date"):
+                query = query.filter(UserTransaction.created_at >= kwargs["from_date"])
+            if kwargs.get("to_date"):
+                query = query.filter(UserTransaction.created_at <= kwargs["to_date"])
+
+            user_transactions, next_cursor = paginate_keyset(
+                query,
+                UserTransaction.created_at,
+                UserTransaction.id,
+                kwargs.get("cursor"),
+                kwargs["limit"],
+            )
+            return fast_response(
+                "User transactions fetched successfully",
                 dict(
-                    message="User transactions fetched successfully",
-                    data=[
+                    transactions=[
                         user_transaction.to_dict()
                         for user_transaction in user_transactions
                     ],
-                )
+                    next_cursor=next_cursor,
+                ),
             )
+        except InvalidCursor as e:
+            return api_response.dump(dict(message=str(e))), 400
         except Exception as e:
-            return APIResponse().dump(dict(message=str(e))), 500
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
 
 
 api.add_resource(UserTransactionsAPI, "/user/transactions")
@@ -287,75 +372,209 @@ docs.register(UserTransactionsAPI)
 
 class UserBalanceAPI(MethodResource, Resource):
     @doc(description="Get User Balance API", tags=["Get User Balance API"])
-    @marshal_with(APIResponse)  # marshalling
-    @login.user_loader
+    @marshal_with(api_response)  # marshalling
+    @login_required
     def get(self):
         try:
-            user_balance = UserBalance.query.filter_by(
-                user_id=current_user.get_id()
-            ).first()
+            user_id = current_user.id
+            user_balance = cache.get_or_load(
+                balance_key(user_id), lambda: self.load_balance(user_id)
+            )
             if not user_balance:
                 return (
-                    APIResponse().dump(dict(message="User balance not found")),
+                    api_response.dump(dict(message="User balance not found")),
                     404,
                 )
 
-            return APIResponse().dump(
+            return fast_response("User balance fetched successfully", user_balance)
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+    @staticmethod
+    def load_balance(user_id):
+        balance = ledger_balance(user_id)
+        if balance is None:
+            return None
+        return dict(user_id=user_id, balance=from_cents(balance))
+
+
+api.add_resource(UserBalanceAPI, "/user/balance")
+docs.register(UserBalanceAPI)
+
+
+class UserBalanceByFriendAPI(MethodResource, Resource):
+    @doc(
+        description="Get User Balances By Friend API",
+        tags=["Get User Balances By Friend API"],
+    )
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self):
+        try:
+            user_id = current_user.id
+            pairwise_balances = PairwiseBalance.query.filter_by(
+                user_a=user_id
+            ).all() + PairwiseBalance.query.filter_by(user_b=user_id).all()
+
+            return api_response.dump(
                 dict(
-                    message="User balance fetched successfully",
-                    data=user_balance.to_dict(),
+                    message="User balances fetched successfully",
+                    data=dict(
+                        balances=[
+                            dict(
+                                friend_id=pairwise_balance.friend_of(user_id),
+                                balance=from_cents(
+                                    pairwise_balance.balance_for(user_id)
+                                ),
+                            )
+                            for pairwise_balance in pairwise_balances
+                            if pairwise_balance.net
+                        ]
+                    ),
                 )
             )
         except Exception as e:
-            return APIResponse().dump(dict(message=str(e))), 500
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
 
 
-api.add_resource(UserBalanceAPI, "/user/balance")
-docs.register(UserBalanceAPI)
+api.add_resource(UserBalanceByFriendAPI, "/user/balances/by-friend")
+docs.register(UserBalanceByFriendAPI)
+
+
+class UserSettlementsAPI(MethodResource, Resource):
+    @doc(description="Get User Settlements API", tags=["Get User Settlements API"])
+    @use_kwargs(SettlementRequest, location=("query"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, **kwargs):
+        try:
+            if kwargs["source"] == "transactions":
+                balances = balances_from_transactions()
+            else:
+                balances = balances_from_table()
+
+            user_id = current_user.id
+            settlements = [
+                dict(
+                    payer_id=payer_id,
+                    recipient_id=recipient_id,
+                    amount=from_cents(amount),
+                )
+                for payer_id, recipient_id, amount in simplify_debts(balances)
+                if user_id in (payer_id, recipient_id)
+            ]
+            return api_response.dump(
+                dict(
+                    message="User settlements fetched successfully",
+                    data=dict(settlements=settlements),
+                )
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(UserSettlementsAPI, "/user/settlements")
+docs.register(UserSettlementsAPI)
+
+
+class UserAnalyticsAPI(MethodResource, Resource):
+    @doc(description="Get User Analytics API", tags=["Get User Analytics API"])
+    @use_kwargs(AnalyticsRequest, location=("query"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, **kwargs):
+        try:
+            summary = spending_summary(
+                current_user.id,
+                kwargs["group_by"],
+                kwargs.get("from_date"),
+                kwargs.get("to_date"),
+            )
+            return fast_response(
+                "User analytics fetched successfully", dict(analytics=summary)
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(UserAnalyticsAPI, "/user/analytics")
+docs.register(UserAnalyticsAPI)
+
+
+class UserExportAPI(MethodResource, Resource):
+    @doc(description="Export User Ledger API", tags=["Export User Ledger API"])
+    @use_kwargs(ExportRequest, location=("query"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, **kwargs):
+        try:
+            format = kwargs["format"]
+            mimetype = "text/csv" if format == "csv" else "application/x-ndjson"
+            return Response(
+                stream_with_context(export_ledger(current_user.id, format)),
+                mimetype=mimetype,
+                headers={
+                    "Content-Disposition": f"attachment; filename=ledger.{format}"
+                },
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(UserExportAPI, "/user/export")
+docs.register(UserExportAPI)
 
 
 class CreateTransactionAPI(MethodResource, Resource):
     @doc(description="Create Transaction API", tags=["Create Transaction API"])
     @use_kwargs(UserTransactionSchema, location=("json"))
-    @marshal_with(APIResponse)  # marshalling
-    @login.user_loader
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    @idempotent
     def post(self, **kwargs):
         try:
+            recipient = db.session.get(User, kwargs["recipient_id"])
+            if recipient is None:
+                return api_response.dump(dict(message="Recipient not found")), 400
+            if recipient.id == current_user.id:
+                return (
+                    api_response.dump(dict(message="You cannot pay yourself")),
+                    400,
+                )
+            if kwargs.get("group_id") is not None:
+                check_group_members(kwargs["group_id"], [current_user.id, recipient.id])
+
             user_transaction = UserTransaction()
-            user_transaction.payer_id = current_user.get_id()
-            user_transaction.recipient_id = kwargs["recipient_id"]
-            user_transaction.amount = kwargs["amount"]
+            user_transaction.payer_id = current_user.id
+            user_transaction.recipient_id = recipient.id
+            user_transaction.paid_to = recipient
+            user_transaction.amount = to_cents(kwargs["amount"])
             user_transaction.description = kwargs["description"]
-            user_transaction.created_at = time.strftime("%Y-%m-%d")
+            user_transaction.group_id = kwargs.get("group_id")
+            user_transaction.created_at = datetime.date.today()
 
-            user_balance = UserBalance.query.filter_by(
-                user_id=current_user.get_id()
-            ).first()
-            
-            if not user_balance:
-                user_balance = UserBalance()
-                user_balance.user_id = current_user.get_id()
-                user_balance.balance = 0
-
-            user_balance.balance -= kwargs["amount"]
-            db.session.add(user_balance)
             db.session.add(user_transaction)
-            db.session.commit()
-
-            user_balance = UserBalance.query.filter_by(
-                user_id=kwargs["recipient_id"]
-            ).first()
-            if not user_balance:
-                user_balance = UserBalance()
-                user_balance.user_id = kwargs["recipient_id"]
-                user_balance.balance = 0
-
-            user_balance.balance += kwargs["amount"]
-            db.session.add(user_balance)
-            db.session.commit()
+            apply_transfers(
+                [
+                    (
+                        current_user.id,
+                        kwargs["recipient_id"],
+                        user_transaction.amount,
+                        None,
+                    )
+                ],
+                LedgerEntry.PAYMENT,
+            )
+            # @idempotent commits the payment together with the stored response
+            db.session.flush()
 
             return (
-                APIResponse().dump(
+                api_response.dump(
                     dict(
                         message="Transaction created successfully",
                         data=user_transaction.to_dict(),
@@ -363,9 +582,36 @@ class CreateTransactionAPI(MethodResource, Resource):
                 ),
                 200,
             )
+        except InvalidGroup as e:
+            return api_response.dump(dict(message=str(e))), 400
         except Exception as e:
-            return APIResponse().dump(dict(message=str(e))), 500
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            db.session.rollback()
+            return api_response.dump(dict(message=str(e))), 500
 
 
 api.add_resource(CreateTransactionAPI, "/transactions")
 docs.register(CreateTransactionAPI)
+
+
+class CacheStatsAPI(MethodResource, Resource):
+    @doc(description="Get Cache Stats API", tags=["Get Cache Stats API"])
+    @marshal_with(api_response)  # marshalling
+    def get(self):
+        return api_response.dump(
+            dict(message="Cache stats fetched successfully", data=cache.stats())
+        )
+
+
+api.add_resource(CacheStatsAPI, "/cache/stats")
+docs.register(CacheStatsAPI)
+
+
+class MetricsAPI(MethodResource, Resource):
+    @doc(description="Prometheus Metrics API", tags=["Prometheus Metrics API"])
+    def get(self):
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+api.add_resource(MetricsAPI, "/metrics")
+docs.register(MetricsAPI)
@@ -0,0 +1,188 @@
+import logging
+
+from flask import Blueprint, request
+from marshmallow import fields
+from flask_restful import Resource
+from flask_apispec.views import MethodResource
+from flask_apispec import marshal_with, doc, use_kwargs
+from flask_login import current_user, login_required
+
+from ..models import db, Expense, Group
+from ..models.group import group_members_table
+from ..models.money import from_cents
+from ..controller import api, ma, docs
+from ..controller.expense_routes import ExpenseAPI, ListExpensesRequest, api_response
+from ..services import (
+    InvalidCursor,
+    InvalidGroup,
+    create_group,
+    group_balances,
+    is_group_member,
+    simplify_debts,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CreateGroupRequest(ma.Schema):
+    name = fields.Str(required=True)
+    members = fields.List(fields.Int(), required=True)
+
+
+group_routes = Blueprint("group_routes", __name__, url_prefix="/api/groups")
+
+
+def group_access_error(group_id):
+    """Error response unless the current user may see the group."""
+    if not db.session.get(Group, group_id):
+        return api_response.dump(dict(message="Group not found")), 404
+    if not is_group_member(group_id, current_user.id):
+        return (
+            api_response.dump(dict(message="You are not a member of this group")),
+            403,
+        )
+    return None
+
+
+class GroupAPI(MethodResource, Resource):
+    @doc(description="Create Group API", tags=["Create Group API"])
+    @use_kwargs(CreateGroupRequest, location=("json"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def post(self, **kwargs):
+        try:
+            group = create_group(current_user.id, kwargs["name"], kwargs["members"])
+            return (
+                api_response.dump(
+                    dict(message="Group created successfully", data=group.to_dict())
+                ),
+                200,
+            )
+        except InvalidGroup as e:
+            return api_response.dump(dict(message=str(e))), 400
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            db.session.rollback()
+            return api_response.dump(dict(message=str(e))), 500
+
+    @doc(description="Get Groups API", tags=["Get Groups API"])
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self):
+        try:
+            groups = (
+                Group.query.join(
+                    group_members_table, group_members_table.c.group_id == Group.id
+                )
+                .filter(group_members_table.c.user_id == current_user.id)
+                .order_by(Group.id)
+                .all()
+            )
+            return api_response.dump(
+                dict(
+                    message="Groups fetched successfully",
+                    data=dict(groups=[group.to_dict() for group in groups]),
+                )
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(GroupAPI, "/groups")
+docs.register(GroupAPI)
+
+
+class GroupExpensesAPI(MethodResource, Resource):
+    @doc(description="Get Group Expenses API", tags=["Get Group Expenses API"])
+    @use_kwargs(ListExpensesRequest, location=("query"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, group_id, **kwargs):
+        try:
+            error = group_access_error(group_id)
+            if error:
+                return error
+
+            return api_response.dump(
+                dict(
+                    message="Group expenses fetched successfully",
+                    data=ExpenseAPI.expense_page(
+                        Expense.query.filter_by(group_id=group_id), **kwargs
+                    ),
+                )
+            )
+        except InvalidCursor as e:
+            return api_response.dump(dict(message=str(e))), 400
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(GroupExpensesAPI, "/groups/<int:group_id>/expenses")
+docs.register(GroupExpensesAPI)
+
+
+class GroupBalancesAPI(MethodResource, Resource):
+    @doc(description="Get Group Balances API", tags=["Get Group Balances API"])
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, group_id):
+        try:
+            error = group_access_error(group_id)
+            if error:
+                return error
+
+            return api_response.dump(
+                dict(
+                    message="Group balances fetched successfully",
+                    data=dict(
+                        balances=[
+                            dict(user_id=user_id, balance=from_cents(balance))
+                            for user_id, balance in group_balances(group_id).items()
+                        ]
+                    ),
+                )
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(GroupBalancesAPI, "/groups/<int:group_id>/balances")
+docs.register(GroupBalancesAPI)
+
+
+class GroupSettlementsAPI(MethodResource, Resource):
+    @doc(description="Get Group Settlements API", tags=["Get Group Settlements API"])
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, group_id):
+        try:
+            error = group_access_error(group_id)
+            if error:
+                return error
+
+            settlements = [
+                dict(
+                    payer_id=payer_id,
+                    recipient_id=recipient_id,
+                    amount=from_cents(amount),
+                )
+                for payer_id, recipient_id, amount in simplify_debts(
+                    group_balances(group_id)
+                )
+            ]
+            return api_response.dump(
+                dict(
+                    message="Group settlements fetched successfully",
+                    data=dict(settlements=settlements),
+                )
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(GroupSettlementsAPI, "/groups/<int:group_id>/settlements")
+docs.register(GroupSettlementsAPI)
@@ -0,0 +1,124 @@
+import logging
+
+from flask import Blueprint, request
+from marshmallow import fields
+from flask_restful import Resource
+from flask_apispec.views import MethodResource
+from flask_apispec import marshal_with, doc, use_kwargs
+from flask_login import current_user, login_required
+
+from ..models import db, RecurringExpense
+from ..controller import api, docs
+from ..controller.expense_routes import CreateExpenseRequest, api_response
+from ..services import InvalidGroup, InvalidSplit, create_recurring_expense
+
+logger = logging.getLogger(__name__)
+
+
+class CreateRecurringExpenseRequest(CreateExpenseRequest):
+    frequency = fields.Str(
+        required=True, validate=fields.validate.OneOf(["DAILY", "WEEKLY", "MONTHLY"])
+    )
+    every = fields.Int(missing=1, validate=fields.validate.Range(min=1))
+    start_date = fields.Date(required=False)
+    end_date = fields.Date(required=False)
+
+
+recurring_routes = Blueprint(
+    "recurring_routes", __name__, url_prefix="/api/recurring-expenses"
+)
+
+
+class RecurringExpenseAPI(MethodResource, Resource):
+    @doc(
+        description="Create Recurring Expense API",
+        tags=["Create Recurring Expense API"],
+    )
+    @use_kwargs(CreateRecurringExpenseRequest, location=("json"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def post(self, **kwargs):
+        try:
+            template = create_recurring_expense(current_user.id, **kwargs)
+            return (
+                api_response.dump(
+                    dict(
+                        message="Recurring expense created successfully",
+                        data=template.to_dict(),
+                    )
+                ),
+                200,
+            )
+        except (InvalidSplit, InvalidGroup) as e:
+            return api_response.dump(dict(message=str(e))), 400
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            db.session.rollback()
+            return api_response.dump(dict(message=str(e))), 500
+
+    @doc(description="Get Recurring Expenses API", tags=["Get Recurring Expenses API"])
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self):
+        try:
+            templates = (
+                RecurringExpense.query.filter_by(paid_by=current_user.id)
+                .order_by(RecurringExpense.id)
+                .all()
+            )
+            return api_response.dump(
+                dict(
+                    message="Recurring expenses fetched successfully",
+                    data=dict(
+                        recurring_expenses=[
+                            template.to_dict() for template in templates
+                        ]
+                    ),
+                )
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(RecurringExpenseAPI, "/recurring-expenses")
+docs.register(RecurringExpenseAPI)
+
+
+class RecurringExpenseDetailsAPI(MethodResource, Resource):
+    @doc(
+        description="Delete Recurring Expense API",
+        tags=["Delete Recurring Expense API"],
+    )
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def delete(self, recurring_expense_id):
+        try:
+            template = db.session.get(RecurringExpense, recurring_expense_id)
+            if not template:
+                return (
+                    api_response.dump(dict(message="Recurring expense not found")),
+                    404,
+                )
+            if current_user.id != template.paid_by:
+                return (
+                    api_response.dump(dict(message="You are not allowed to delete")),
+                    403,
+                )
+
+            # expenses already created from it are kept
+            db.session.delete(template)
+            db.session.commit()
+            return api_response.dump(
+                dict(message="Recurring expense deleted successfully")
+            )
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            db.session.rollback()
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(
+    RecurringExpenseDetailsAPI, "/recurring-expenses/<int:recurring_expense_id>"
+)
+docs.register(RecurringExpenseDetailsAPI)
@@ -0,0 +1,54 @@
+import logging
+
+from flask import Blueprint, request
+from marshmallow import fields
+from flask_restful import Resource
+from flask_apispec.views import MethodResource
+from flask_apispec import marshal_with, doc, use_kwargs
+from flask_login import current_user, login_required
+
+from ..controller import api, docs, ma
+from ..controller.expense_routes import api_response
+from ..services import fast_response, search_expenses, search_users
+
+logger = logging.getLogger(__name__)
+
+
+class SearchRequest(ma.Schema):
+    q = fields.Str(required=True, validate=fields.validate.Length(min=1, max=100))
+    type = fields.Str(
+        missing="all", validate=fields.validate.OneOf(["all", "expenses", "users"])
+    )
+    limit = fields.Int(missing=20, validate=fields.validate.Range(min=1, max=50))
+
+
+search_routes = Blueprint("search_routes", __name__, url_prefix="/api/search")
+
+
+class SearchAPI(MethodResource, Resource):
+    @doc(description="Search API", tags=["Search API"])
+    @use_kwargs(SearchRequest, location=("query"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
+    def get(self, **kwargs):
+        try:
+            q, limit = kwargs["q"], kwargs["limit"]
+            data = {}
+            if kwargs["type"] in ("all", "expenses"):
+                data["expenses"] = [
+                    expense.to_dict()
+                    for expense in search_expenses(current_user.id, q, limit)
+                ]
+            if kwargs["type"] in ("all", "users"):
+                data["users"] = [
+                    {"id": user.id, "username": user.username, "name": user.name}
+                    for user in search_users(q, limit)
+                ]
+            return fast_response("Search results fetched successfully", data)
+        except Exception as e:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            return api_response.dump(dict(message=str(e))), 500
+
+
+api.add_resource(SearchAPI, "/search")
+docs.register(SearchAPI)
@@ -1,3 +1,5 @@
+import logging
+
 from flask import Blueprint, jsonify
 from marshmallow import Schema, fields
 from flask_restful import Resource, Api
@@ -5,8 +7,11 @@ from flask_apispec.views import MethodResource
 from flask_apispec import marshal_with, doc, use_kwargs
 from flask_login import current_user, login_user, logout_user, login_required
 
-from ..models import db, User
+from ..models import db, HashingBusy, User, hasher
 from ..controller import api, ma, docs, login
+from ..services import forget_identity, remember_identity, revoke_identities
+
+logger = logging.getLogger(__name__)
 
 
 class APIResponse(Schema):
@@ -14,6 +19,9 @@ class APIResponse(Schema):
     data = fields.Dict(default={})
 
 
+api_response = APIResponse()
+
+
 class UserSchema(ma.Schema):
     class Meta:
         model = User
@@ -35,6 +43,10 @@ class LoginRequest(ma.Schema):
         fields = ("username", "password")
 
 
+class LogoutRequest(ma.Schema):
+    everywhere = fields.Bool(missing=False)
+
+
 # Create a Blueprint for users
 user_routes = Blueprint("user_routes", __name__, url_prefix="/api/users")
 
@@ -42,7 +54,7 @@ user_routes = Blueprint("user_routes", __name__, url_prefix="/api/users")
 class SignUpAPI(MethodResource, Resource):
     @doc(description="Sign Up API", tags=["SignUp API"])
     @use_kwargs(SignUpRequest, location=("json"))
-    @marshal_with(APIResponse)  # marshalling
+    @marshal_with(api_response)  # marshalling
     def post(self, **kwargs):
         try:
             user = User(
@@ -56,8 +68,9 @@ class SignUpAPI(MethodResource, Resource):
             db.session.add(user)
             db.session.commit()
             login_user(user)
+            remember_identity(user)
             return (
-                APIResponse().dump(
+                api_response.dump(
                     dict(
                         message="User is successfully registerd",
                         data=user_schema.dump(user),
@@ -65,10 +78,13 @@ class SignUpAPI(MethodResource, Resource):
                 ),
                 200,
             )
+        except HashingBusy as e:
+            db.session.rollback()
+            return api_response.dump(dict(message=str(e))), 503
         except Exception as e:
-            print(str(e))
+            logger.exception("Not able to register user")
             return (
-                APIResponse().dump(
+                api_response.dump(
                     dict(message=f"Not able to register User : {str(e)}")
                 ),
                 400,
@@ -82,18 +98,18 @@ docs.register(SignUpAPI)
 class LoginAPI(MethodResource, Resource):
     @doc(description="Login API", tags=["Login API"])
     @use_kwargs(LoginRequest, location=("json"))
-    @marshal_with(APIResponse)  # marshalling
-    @login.user_loader
+    @marshal_with(api_response)  # marshalling
     def post(self, **kwargs):
         try:
             user = User.query.filter_by(username=kwargs["username"]).first()
             if user and user.check_password(kwargs["password"]):
-                user.authenticated = True
-                db.session.add(user)
-                db.session.commit()
+                if hasher.needs_rehash(user.password):
+                    user.password = kwargs["password"]
+                    db.session.commit()
                 login_user(user, force=True, remember=True)
+                remember_identity(user)
                 return (
-                    APIResponse().dump(
+                    api_response.dump(
                         dict(
                             message="User is successfully logged in",
                             data=user_schema.dump(user),
@@ -103,13 +119,15 @@ class LoginAPI(MethodResource, Resource):
                 )
             else:
                 return (
-                    APIResponse().dump(dict(message=f"Invalid username or password")),
+                    api_response.dump(dict(message=f"Invalid username or password")),
                     400,
                 )
+        except HashingBusy as e:
+            return api_response.dump(dict(message=str(e))), 503
         except Exception as e:
-            print(str(e))
+            logger.exception("Not able to login")
             return (
-                APIResponse().dump(dict(message=f"Not able to login : {str(e)}")),
+                api_response.dump(dict(message=f"Not able to login : {str(e)}")),
                 400,
             )
 
@@ -120,13 +138,17 @@ docs.register(LoginAPI)
 
 class LogoutAPI(MethodResource, Resource):
     @doc(description="Logout API", tags=["Logout API"])
-    @marshal_with(APIResponse)  # marshalling
-    @login.user_loader
+    @use_kwargs(LogoutRequest, location=("query"))
+    @marshal_with(api_response)  # marshalling
+    @login_required
     def post(self, **kwargs):
         try:
+            if kwargs["everywhere"]:
+                revoke_identities(current_user.id)
             logout_user()
+            forget_identity()
             return (
-                APIResponse().dump(
+                api_response.dump(
                     dict(
                         message="User is successfully logged out",
                     )
@@ -134,9 +156,9 @@ class LogoutAPI(MethodResource, Resource):
                 200,
             )
         except Exception as e:
-            print(str(e))
+            logger.exception("Not able to logout")
             return (
-                APIResponse().dump(dict(message=f"Not able to logout : {str(e)}")),
+                api_response.dump(dict(message=f"Not able to logout : {str(e)}")),
                 400,
             )
 
@@ -1,6 +1,17 @@
 from .db import db
+from .hashing import HashingBusy, hasher
+from .routing import router
 
 from .user import User
 from .balance import UserBalance
 from .expense import Expense
 from .transaction import UserTransaction
+
+from .pairwise_balance import PairwiseBalance
+from .ledger import BalanceSnapshot, LedgerEntry
+from .group import Group
+from .idempotency import IdempotencyKey
+from .rollup import SpendingRollup
+from .job import Job
+from .recurring_expense import RecurringExpense
+from .search import create_search_index
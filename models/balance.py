@@ -1,15 +1,18 @@
 from .db import db
+from .money import from_cents
 
 class UserBalance(db.Model):
     __tablename__ = "balances"
+    __table_args__ = (db.UniqueConstraint("user_id", name="uq_balances_user_id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    balance = db.Column(db.Float, nullable=False)
+    # balance in cents
+    balance = db.Column(db.BigInteger, nullable=False)
 
     def to_dict(self):
         return {
             "id": self.id,
             "user_id": self.user_id,
-            "balance": self.balance,
+            "balance": from_cents(self.balance),
         }
\ No newline at end of file
@@ -1,4 +1,5 @@
 from .db import db
+from .money import from_cents
 
 from enum import Enum
 
@@ -9,30 +10,45 @@ class SplitType(Enum):
 
 members_table = db.Table('members',
     db.Column('expense_id', db.Integer, db.ForeignKey('expenses.id')),
-    db.Column('user_id', db.Integer, db.ForeignKey('users.id'))
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id')),
+    db.Index("ix_members_expense_id", "expense_id"),
+    db.Index("ix_members_user_id_expense_id", "user_id", "expense_id"),
 )
 
 class Expense(db.Model):
     __tablename__ = "expenses"
+    __table_args__ = (
+        db.Index("ix_expenses_paid_by_date_id", "paid_by", "date", "id"),
+        db.Index("ix_expenses_group_id_date_id", "group_id", "date", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     paid_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    # amount in cents
+    amount = db.Column(db.BigInteger, nullable=False)
     description = db.Column(db.String(255), nullable=False)
     category = db.Column(db.String(255), nullable=False)
     split_type = db.Column(db.Enum(SplitType), nullable=False)
     # owed_by should be a list of user ids
     owed_by = db.relationship('User', secondary=members_table, backref='expenses')
     date = db.Column(db.Date, nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=True)
+    # false until a deferred expense_fanout job has created the transactions
+    fanned_out = db.Column(db.Boolean, nullable=False, default=True)
 
 
     def to_dict(self):
         return {
             "id": self.id,
             "paid_by": self.paid_by,
-            "amount": self.amount,
+            "amount": from_cents(self.amount),
             "description": self.description,
             "category": self.category,
-            "type": self.split_type,
+            "type": self.split_type.value,
             "date": self.date,
+            "group_id": self.group_id,
+            "owed_by": [
+                {"id": user.id, "username": user.username, "name": user.name}
+                for user in self.owed_by
+            ],
         }
\ No newline at end of file
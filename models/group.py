@@ -0,0 +1,26 @@
+from .db import db
+
+group_members_table = db.Table(
+    "group_members",
+    db.Column("group_id", db.Integer, db.ForeignKey("groups.id"), primary_key=True),
+    db.Column("user_id", db.Integer, db.ForeignKey("users.id"), primary_key=True),
+    db.Index("ix_group_members_user_id", "user_id"),
+)
+
+
+class Group(db.Model):
+    __tablename__ = "groups"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    created_at = db.Column(db.Date, nullable=False)
+    members = db.relationship("User", secondary=group_members_table, backref="groups")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "created_by": self.created_by,
+            "created_at": self.created_at,
+        }
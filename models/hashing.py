@@ -0,0 +1,81 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = "pbkdf2:sha256:600000"
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing in a bounded process pool, off the request thread.
+
+    Configured from ``PASSWORD_HASH_METHOD`` (Werkzeug method string, cost
+    included), ``PASSWORD_HASH_WORKERS`` (``0`` hashes inline),
+    ``PASSWORD_HASH_QUEUE_DEPTH`` and ``PASSWORD_HASH_TIMEOUT`` in seconds.
+    Once the queue is full new work is refused with ``HashingBusy`` rather
+    than piling up behind a login burst.
+    """
+
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.prefix = DEFAULT_METHOD
+        self.workers = os.cpu_count() or 1
+        self.queue_depth = self.workers * 4
+        self.timeout = 10
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+        # hashes record the method with every default filled in, e.g. "scrypt"
+        # is stored as "scrypt:32768:8:1", so read it back from a throwaway hash
+        self.prefix = generate_password_hash("", self.method, 1).split("$", 1)[0]
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.queue_depth = app.config.get(
+            "PASSWORD_HASH_QUEUE_DEPTH", self.workers * 4
+        )
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", self.timeout)
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        with self._lock:
+            # pools do not survive a fork, so each server worker gets its own
+            if self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(self.workers)
+                self._slots = threading.BoundedSemaphore(self.queue_depth)
+                self._pid = os.getpid()
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy("Too many password operations in progress")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            raise HashingBusy("Password operation timed out")
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, hashed_password, password):
+        return self._run(check_password_hash, hashed_password, password)
+
+    def needs_rehash(self, hashed_password):
+        return hashed_password.split("$", 1)[0] != self.prefix
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,27 @@
+from .db import db
+
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a write made with an ``Idempotency-Key`` header.
+
+    The key row, ``status_code`` and ``response`` are committed in the same
+    transaction as the write itself, so a committed key always has a response.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+        db.Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+    id = db.Column(
+        db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # sha256 of method, path and body, so a key cannot be reused for another request
+    fingerprint = db.Column(db.String(64), nullable=False)
+    # only empty between the handler's flush and the commit that stores the response
+    status_code = db.Column(db.Integer, nullable=True)
+    response = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
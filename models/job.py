@@ -0,0 +1,34 @@
+from .db import db
+
+
+class Job(db.Model):
+    """Deferred unit of work, run by ``flask run-worker``.
+
+    ``run_after`` is when a pending job is due; while a job is running it is
+    the end of the worker's lease, after which another worker may claim it.
+    Jobs are deleted once they succeed.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_after", "status", "run_after"),
+        db.Index("ix_jobs_key", "key"),
+    )
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    FAILED = "FAILED"
+
+    id = db.Column(
+        db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True
+    )
+    kind = db.Column(db.String(50), nullable=False)
+    # what the job is about, e.g. "expense:42", so it can be found and cancelled
+    key = db.Column(db.String(100), nullable=True)
+    # JSON encoded keyword arguments of the handler
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_after = db.Column(db.DateTime, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
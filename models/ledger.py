@@ -0,0 +1,38 @@
+from .db import db
+
+
+class LedgerEntry(db.Model):
+    """Append-only record of every change to a user's balance, in cents.
+
+    Rows are never updated or deleted; undoing something appends a
+    compensating entry instead.
+    """
+
+    __tablename__ = "ledger_entries"
+    __table_args__ = (db.Index("ix_ledger_entries_user_id_id", "user_id", "id"),)
+
+    EXPENSE = "EXPENSE"
+    REVERSAL = "REVERSAL"
+    PAYMENT = "PAYMENT"
+    ADJUSTMENT = "ADJUSTMENT"
+
+    id = db.Column(
+        db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    # no foreign key: entries outlive the expense they refer to
+    expense_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+
+class BalanceSnapshot(db.Model):
+    """A user's balance including every ledger entry up to ``last_entry_id``."""
+
+    __tablename__ = "balance_snapshots"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    last_entry_id = db.Column(db.BigInteger, nullable=False)
+    balance = db.Column(db.BigInteger, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,44 @@
+import math
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+
+CENT = Decimal("0.01")
+# largest amount accepted from clients, in major units; its cents and the sums
+# balances build from many of them stay well inside a signed 64-bit BIGINT
+MAX_AMOUNT = 10**12
+
+
+def to_decimal(value):
+    """Exact decimal for an API number, e.g. ``0.1`` stays ``Decimal("0.1")``."""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def to_cents(amount):
+    """Integer minor units for a major-unit amount, rounding half up."""
+    return int(to_decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents):
+    """Major-unit amount for API responses."""
+    return cents / 100
+
+
+def allocate(total, weights):
+    """Split integer ``total`` in proportion to ``weights`` without losing a unit.
+
+    Every part gets its floored exact share, then the leftover units go one
+    each to the parts with the largest remainders, earliest part first on ties,
+    so the result is deterministic and always sums to ``total``.
+    """
+    weights = [Fraction(to_decimal(weight)) for weight in weights]
+    weight_total = sum(weights)
+    exact = [total * weight / weight_total for weight in weights]
+    parts = [math.floor(share) for share in exact]
+
+    leftover = total - sum(parts)
+    by_remainder = sorted(
+        range(len(parts)), key=lambda index: (parts[index] - exact[index], index)
+    )
+    for index in by_remainder[:leftover]:
+        parts[index] += 1
+    return parts
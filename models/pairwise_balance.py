@@ -0,0 +1,35 @@
+from .db import db
+from .money import from_cents
+
+
+class PairwiseBalance(db.Model):
+    """Net balance between two users, stored once per pair with user_a < user_b.
+
+    A positive ``net`` (in cents) means ``user_b`` owes ``user_a``.
+    """
+
+    __tablename__ = "pairwise_balances"
+    __table_args__ = (
+        db.UniqueConstraint("user_a", "user_b", name="uq_pairwise_balances_users"),
+        db.Index("ix_pairwise_balances_user_b", "user_b"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_a = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_b = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    net = db.Column(db.BigInteger, nullable=False)
+
+    def balance_for(self, user_id):
+        """Cents the other user of the pair owes ``user_id``."""
+        return self.net if user_id == self.user_a else -self.net
+
+    def friend_of(self, user_id):
+        return self.user_b if user_id == self.user_a else self.user_a
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_a": self.user_a,
+            "user_b": self.user_b,
+            "net": from_cents(self.net),
+        }
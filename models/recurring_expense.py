@@ -0,0 +1,61 @@
+from enum import Enum
+
+from .db import db
+from .expense import SplitType
+from .money import from_cents
+
+
+class Frequency(Enum):
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+
+
+class RecurringExpense(db.Model):
+    """Template materialized into an expense every ``every`` ``frequency`` units.
+
+    Occurrences are counted from ``start_date`` so monthly schedules keep their
+    day of month. ``next_run`` is the date of the next occurrence and becomes
+    ``NULL`` once the schedule is past ``end_date``.
+    """
+
+    __tablename__ = "recurring_expenses"
+    __table_args__ = (
+        db.Index("ix_recurring_expenses_next_run", "next_run"),
+        db.Index("ix_recurring_expenses_paid_by", "paid_by"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    paid_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # amount in cents
+    amount = db.Column(db.BigInteger, nullable=False)
+    description = db.Column(db.String(255), nullable=False)
+    category = db.Column(db.String(255), nullable=False)
+    split_type = db.Column(db.Enum(SplitType), nullable=False)
+    owed_by = db.Column(db.JSON, nullable=False)
+    split_values = db.Column(db.JSON, nullable=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=True)
+    frequency = db.Column(db.Enum(Frequency), nullable=False)
+    every = db.Column(db.Integer, nullable=False, default=1)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=True)
+    occurrences = db.Column(db.Integer, nullable=False, default=0)
+    next_run = db.Column(db.Date, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "paid_by": self.paid_by,
+            "amount": from_cents(self.amount),
+            "description": self.description,
+            "category": self.category,
+            "type": self.split_type.value,
+            "owed_by": self.owed_by,
+            "split_values": self.split_values,
+            "group_id": self.group_id,
+            "frequency": self.frequency.value,
+            "every": self.every,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "next_run": self.next_run,
+        }
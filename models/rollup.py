@@ -0,0 +1,20 @@
+from .db import db
+
+
+class SpendingRollup(db.Model):
+    """Per user, day and category totals of expenses, in cents.
+
+    ``spent`` is the user's own share of the expenses, ``paid`` what they paid
+    for, and ``expenses`` how many expenses they took part in. Rows are
+    maintained incrementally as expenses are written and deleted.
+    """
+
+    __tablename__ = "spending_rollups"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(255), primary_key=True)
+    spent = db.Column(db.BigInteger, nullable=False, default=0)
+    paid = db.Column(db.BigInteger, nullable=False, default=0)
+    expenses = db.Column(db.Integer, nullable=False, default=0)
+
@@ -0,0 +1,80 @@
+import random
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+READ_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+REPLICA_PREFIX = "replica_"
+STICKY_KEY = "_primary_until"
+
+
+class ReplicaRouter:
+    """Sends reads of safe (GET/HEAD) requests to a replica bind.
+
+    Replicas are the ``SQLALCHEMY_BINDS`` whose key starts with ``replica_``;
+    one is picked per request. After a successful write the client is pinned
+    to the primary for ``REPLICA_STICKY_SECONDS`` so it reads its own writes
+    even when the replicas lag behind. Without replicas nothing is pinned.
+    """
+
+    def __init__(self):
+        self.sticky_seconds = 5
+        self.has_replicas = False
+
+    def init_app(self, app):
+        self.sticky_seconds = app.config.get("REPLICA_STICKY_SECONDS", 5)
+        self.has_replicas = any(
+            key and key.startswith(REPLICA_PREFIX)
+            for key in app.config.get("SQLALCHEMY_BINDS") or {}
+        )
+        app.after_request(self._pin_after_write)
+
+    def _pin_after_write(self, response):
+        if (
+            self.has_replicas
+            and request.method not in READ_METHODS
+            and response.status_code < 400
+        ):
+            session[STICKY_KEY] = time.time() + self.sticky_seconds
+        return response
+
+    def pinned_to_primary(self):
+        return (
+            self.has_replicas
+            and has_request_context()
+            and session.get(STICKY_KEY, 0) > time.time()
+        )
+
+    def replica_for_request(self, engines):
+        if not has_request_context() or request.method not in READ_METHODS:
+            return None
+        if "replica_engine" not in g:
+            replicas = [
+                engine
+                for key, engine in engines.items()
+                if key and key.startswith(REPLICA_PREFIX)
+            ]
+            if replicas and not self.pinned_to_primary():
+                g.replica_engine = random.choice(replicas)
+            else:
+                g.replica_engine = None
+        return g.replica_engine
+
+
+router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica when ``router`` allows it.
+
+    Flushes, explicit binds and anything outside a read-only request keep
+    going to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            replica = router.replica_for_request(self._db.engines)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,59 @@
+from sqlalchemy import DDL, column, event, table
+
+from .db import db
+from .expense import Expense
+
+# MySQL searches expense descriptions through a FULLTEXT index, SQLite through
+# an external content FTS5 table kept in sync with ``expenses`` by triggers.
+# Both are created along with the expenses table; ``create_search_index`` adds
+# them to a database created before search existed.
+
+FTS_TABLE = "expenses_fts"
+
+expenses_fts = table(FTS_TABLE, column("rowid"), column("description"))
+
+description_fulltext = db.Index(
+    "ix_expenses_description_fulltext", Expense.description, mysql_prefix="FULLTEXT"
+).ddl_if(dialect="mysql")
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "description, content='expenses', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, description) "
+    "VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_update "
+    "AFTER UPDATE OF description ON expenses "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, description) "
+    "VALUES (new.id, new.description); END",
+)
+
+for statement in SQLITE_DDL:
+    event.listen(
+        Expense.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    Expense.__table__,
+    "after_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+def create_search_index(connection):
+    """Create the search index of an existing database and fill it."""
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        description_fulltext.create(connection, checkfirst=True)
+    elif dialect == "sqlite":
+        for statement in SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
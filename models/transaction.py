@@ -1,13 +1,31 @@
 from .db import db
+from .money import from_cents
 
 class UserTransaction(db.Model):
     __tablename__ = "transactions"
+    __table_args__ = (
+        db.Index(
+            "ix_transactions_recipient_id_created_at_id",
+            "recipient_id",
+            "created_at",
+            "id",
+        ),
+        db.Index(
+            "ix_transactions_payer_id_created_at_id", "payer_id", "created_at", "id"
+        ),
+        db.Index("ix_transactions_expense_id", "expense_id"),
+        db.Index("ix_transactions_group_id", "group_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     payer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    expense_id = db.Column(db.Integer, db.ForeignKey("expenses.id"), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    expense_id = db.Column(db.Integer, db.ForeignKey("expenses.id"), nullable=True)
+    # set on settle-up payments within a group; expense transactions get their
+    # group from the expense
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=True)
+    # amount in cents
+    amount = db.Column(db.BigInteger, nullable=False)
     description = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.Date, nullable=False)
 
@@ -18,8 +36,13 @@ class UserTransaction(db.Model):
     def to_dict(self):
         return {
             "id": self.id,
-            "user_id": self.user_id,
-            "amount": self.amount,
+            "payer_id": self.payer_id,
+            "payer_name": self.paid_by.name,
+            "recipient_id": self.recipient_id,
+            "recipient_name": self.paid_to.name,
+            "expense_id": self.expense_id,
+            "group_id": self.group_id,
+            "amount": from_cents(self.amount),
             "description": self.description,
-            "date": self.date,
+            "date": self.created_at,
         }
\ No newline at end of file
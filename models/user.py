@@ -1,13 +1,15 @@
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import Column, Integer, String
 
 from .db import db
+from .hashing import hasher
 
 
 class User(db.Model, UserMixin):
     __tablename__ = "users"
-    
+    # username autocomplete runs prefix scans over the unique username index
+    __table_args__ = (db.Index("ix_users_name", "name"),)
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     username = db.Column(db.String(20), nullable=False, unique=True)
     name = db.Column(db.String(255), nullable=False)
@@ -15,6 +17,8 @@ class User(db.Model, UserMixin):
     # Can use sqlalchemy-utils for mobile number field and validation
     mobile_number = db.Column(db.String(10), nullable=False)
     hashed_password = db.Column(db.String(255), nullable=False)
+    # bumped to revoke every session identity issued before
+    session_epoch = db.Column(db.Integer, nullable=False, default=0)
 
     def __init__(self, username, name, email, mobile_number, password):
         self.username = username
@@ -22,6 +26,7 @@ class User(db.Model, UserMixin):
         self.email = email
         self.mobile_number = mobile_number
         self.password = password
+        self.session_epoch = 0
 
     @property
     def password(self):
@@ -29,10 +34,14 @@ class User(db.Model, UserMixin):
 
     @password.setter
     def password(self, password):
-        self.hashed_password = generate_password_hash(password)
+        self.hashed_password = hasher.hash(password)
+
+    def get_id(self):
+        # the epoch makes session and remember-me tokens revocable
+        return f"{self.id}:{self.session_epoch}"
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return hasher.verify(self.password, password)
 
     def to_dict(self):
         return {
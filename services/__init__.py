@@ -0,0 +1,20 @@
+from .expense_ingest import delete_expense, ingest_expense
+from .jobs import Worker, cancel_jobs, enqueue, job_handler
+from .splits import InvalidSplit, compute_shares, compute_shares_batch
+from .balances import apply_balance_deltas, apply_pairwise_deltas, apply_transfers
+from .expense_import import import_expenses, iter_csv, iter_jsonl
+from .settlement import balances_from_table, balances_from_transactions, simplify_debts
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, paginate_keyset
+from .export import export_ledger, iter_ledger
+from .cache import cache, balance_key, expense_list_key, invalidate_on_commit
+from .identity import SessionUser, forget_identity, load_identity, remember_identity, revoke_identities
+from .ledger import append_adjustments, append_entries, ledger_balance, take_snapshots
+from .reconcile import reconcile_balances
+from .groups import InvalidGroup, check_group_members, create_group, group_balances, is_group_member
+from .query_counter import QueryCounter, count_queries
+from .serializers import fast_response
+from .metrics import metrics
+from .idempotency import idempotent, purge_idempotency_keys
+from .analytics import apply_rollup_deltas, backfill_rollups, expense_rollup_deltas, spending_summary
+from .recurring import create_recurring_expense, materialize_due, occurrence_date
+from .search import rebuild_search_index, search_expenses, search_terms, search_users
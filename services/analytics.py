@@ -0,0 +1,144 @@
+from collections import defaultdict
+
+from sqlalchemy import extract, func
+
+from ..models import db, Expense, SpendingRollup, UserTransaction
+from ..models.money import from_cents
+from .balances import increment_rows
+
+GROUP_BY = ("category", "month")
+
+
+def expense_rollup_deltas(expenses, sign=1):
+    """Rollup deltas for ``(expense, transfers)`` pairs.
+
+    ``transfers`` are the expense's ``(payer_id, recipient_id, amount, _)``
+    tuples: every recipient spent their transfer amount and the payer spent
+    whatever part of the expense nobody owes them. Use ``sign=-1`` when the
+    expenses are deleted.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for expense, transfers in expenses:
+        day, category = expense.date, expense.category
+        owed = sum(amount for _, _, amount, _ in transfers)
+        payer = deltas[(expense.paid_by, day, category)]
+        payer[0] += sign * (expense.amount - owed)
+        payer[1] += sign * expense.amount
+        payer[2] += sign
+        for _, recipient_id, amount, _ in transfers:
+            recipient = deltas[(recipient_id, day, category)]
+            recipient[0] += sign * amount
+            recipient[2] += sign
+    return deltas
+
+
+def apply_rollup_deltas(deltas):
+    """Add ``{(user_id, day, category): [spent, paid, expenses]}``, uncommitted."""
+    increment_rows(
+        SpendingRollup.__table__,
+        ["user_id", "day", "category"],
+        ["spent", "paid", "expenses"],
+        [
+            {
+                "user_id": user_id,
+                "day": day,
+                "category": category,
+                "spent": spent,
+                "paid": paid,
+                "expenses": expenses,
+            }
+            for (user_id, day, category), (spent, paid, expenses) in sorted(
+                deltas.items()
+            )
+        ],
+    )
+
+
+def spending_summary(user_id, group_by, from_date=None, to_date=None):
+    """Totals of the user's rollups per category or per ``YYYY-MM`` month."""
+    if group_by == "category":
+        keys = [SpendingRollup.category]
+    else:
+        keys = [
+            extract("year", SpendingRollup.day).label("year"),
+            extract("month", SpendingRollup.day).label("month"),
+        ]
+
+    query = db.session.query(
+        *keys,
+        func.sum(SpendingRollup.spent),
+        func.sum(SpendingRollup.paid),
+        func.sum(SpendingRollup.expenses),
+    ).filter(SpendingRollup.user_id == user_id)
+    if from_date:
+        query = query.filter(SpendingRollup.day >= from_date)
+    if to_date:
+        query = query.filter(SpendingRollup.day <= to_date)
+    query = query.group_by(*keys).order_by(*keys)
+
+    summary = []
+    for *key, spent, paid, expenses in query:
+        if not expenses:
+            continue
+        if group_by == "category":
+            label = key[0]
+        else:
+            label = f"{int(key[0]):04d}-{int(key[1]):02d}"
+        summary.append(
+            {
+                group_by: label,
+                "spent": from_cents(int(spent)),
+                "paid": from_cents(int(paid)),
+                "expenses": int(expenses),
+            }
+        )
+    return summary
+
+
+def backfill_rollups(chunk_size=10000, progress=None):
+    """Rebuild ``spending_rollups`` from existing expenses.
+
+    Existing rollups are dropped and expenses up to the current highest id are
+    replayed ``chunk_size`` ids at a time, committing after each chunk.
+    Expenses written meanwhile are rolled up by their own requests; run it
+    when no expenses are being deleted, as deleting an expense that has not
+    been replayed yet would subtract it twice. Returns the expenses replayed.
+    """
+    last_id = db.session.query(func.max(Expense.id)).scalar() or 0
+    SpendingRollup.query.delete(synchronize_session=False)
+    db.session.commit()
+
+    replayed = 0
+    for first in range(1, last_id + 1, chunk_size):
+        last = min(first + chunk_size - 1, last_id)
+        expenses = (
+            Expense.query.filter(Expense.id.between(first, last))
+            .with_entities(
+                Expense.id,
+                Expense.paid_by,
+                Expense.amount,
+                Expense.date,
+                Expense.category,
+            )
+            .all()
+        )
+        transfers = defaultdict(list)
+        for expense_id, payer_id, recipient_id, amount in db.session.query(
+            UserTransaction.expense_id,
+            UserTransaction.payer_id,
+            UserTransaction.recipient_id,
+            UserTransaction.amount,
+        ).filter(UserTransaction.expense_id.between(first, last)):
+            transfers[expense_id].append((payer_id, recipient_id, amount, expense_id))
+
+        apply_rollup_deltas(
+            expense_rollup_deltas(
+                (expense, transfers[expense.id]) for expense in expenses
+            )
+        )
+        db.session.commit()
+        replayed += len(expenses)
+        if progress:
+            progress(replayed)
+
+    return replayed
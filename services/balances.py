@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+from sqlalchemy import update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from ..models import db, UserBalance, PairwiseBalance
+from .cache import balance_key, invalidate_on_commit
+from .ledger import append_entries
+
+
+def increment_rows(table, key_columns, columns, rows):
+    """Add each row's ``columns`` to the row matching its key columns, atomically.
+
+    Each row is a single ``INSERT ... ON CONFLICT/DUPLICATE KEY UPDATE
+    column = column + delta`` so concurrent writers never lose an update and
+    missing rows are created in the same statement. Rows should be sorted by
+    key: every transaction then locks them in the same order and concurrent
+    transfers between the same users cannot deadlock.
+    """
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {column: table.c[column] + stmt.inserted[column] for column in columns}
+        )
+    elif dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={
+                column: table.c[column] + stmt.excluded[column] for column in columns
+            },
+        )
+    else:
+        for row in rows:
+            keys = [table.c[key] == row[key] for key in key_columns]
+            updated = db.session.execute(
+                update(table)
+                .where(*keys)
+                .values({column: table.c[column] + row[column] for column in columns})
+            )
+            if not updated.rowcount:
+                db.session.execute(table.insert(), row)
+        return
+
+    db.session.execute(stmt, rows)
+
+
+def apply_balance_deltas(deltas):
+    """Apply ``{user_id: delta}`` to ``balances`` without committing.
+
+    Rows are incremented in place in user id order, creating missing ones.
+    """
+    increment_rows(
+        UserBalance.__table__,
+        ["user_id"],
+        ["balance"],
+        [
+            {"user_id": user_id, "balance": deltas[user_id]}
+            for user_id in sorted(deltas)
+            if deltas[user_id]
+        ],
+    )
+
+
+def apply_pairwise_deltas(deltas):
+    """Apply ``{(user_a, user_b): delta}`` with ``user_a < user_b``, uncommitted."""
+    increment_rows(
+        PairwiseBalance.__table__,
+        ["user_a", "user_b"],
+        ["net"],
+        [
+            {"user_a": user_a, "user_b": user_b, "net": deltas[(user_a, user_b)]}
+            for user_a, user_b in sorted(deltas)
+            if deltas[(user_a, user_b)]
+        ],
+    )
+
+
+def apply_transfers(transfers, kind):
+    """Record ``(payer_id, recipient_id, amount, expense_id)`` transfers.
+
+    The payer of a transfer is owed ``amount`` cents by its recipient. The
+    transfers are appended to the ledger as ``kind`` entries and applied to
+    ``balances`` and ``pairwise_balances``. Nothing is committed, so callers
+    decide the transaction boundary.
+    """
+    transfers = list(transfers)
+    append_entries(transfers, kind)
+
+    user_deltas = defaultdict(int)
+    pairwise_deltas = defaultdict(int)
+    for payer_id, recipient_id, amount, _ in transfers:
+        if payer_id == recipient_id:
+            continue
+
+        user_deltas[payer_id] += amount
+        user_deltas[recipient_id] -= amount
+        if payer_id < recipient_id:
+            pairwise_deltas[(payer_id, recipient_id)] += amount
+        else:
+            pairwise_deltas[(recipient_id, payer_id)] -= amount
+
+    apply_balance_deltas(user_deltas)
+    invalidate_on_commit(
+        db.session, *(balance_key(user_id) for user_id in user_deltas)
+    )
+    apply_pairwise_deltas(pairwise_deltas)
@@ -0,0 +1,138 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models import router
+
+MISSING = object()
+
+
+class LRUCache:
+    """In-process LRU cache whose entries expire ``ttl`` seconds after a write."""
+
+    def __init__(self, maxsize=10000, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisCache:
+    """Cache stored in Redis, or anything exposing Redis' get/set/delete."""
+
+    def __init__(self, client, ttl=30, prefix="splitwise:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return MISSING
+        return pickle.loads(value)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+
+class Cache:
+    """Read-through cache front counting hits and misses.
+
+    Configured from ``CACHE_BACKEND`` (``memory`` or ``redis``), ``CACHE_TTL``,
+    ``CACHE_MAX_SIZE`` and ``CACHE_REDIS_URL``.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or LRUCache()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app, client=None):
+        ttl = app.config.get("CACHE_TTL", 30)
+        if app.config.get("CACHE_BACKEND", "memory") == "redis":
+            if client is None:
+                import redis
+
+                client = redis.Redis.from_url(app.config["CACHE_REDIS_URL"])
+            self.backend = RedisCache(client, ttl=ttl)
+        else:
+            self.backend = LRUCache(app.config.get("CACHE_MAX_SIZE", 10000), ttl)
+
+    def get_or_load(self, key, loader):
+        # clients pinned to the primary after a write skip entries a lagging
+        # replica read may have filled, and refresh them
+        value = MISSING if router.pinned_to_primary() else self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = loader()
+        self.backend.set(key, value)
+        return value
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+cache = Cache()
+
+
+def balance_key(user_id):
+    return f"balance:{user_id}"
+
+
+def expense_list_key(user_id):
+    return f"expenses:{user_id}"
+
+
+def invalidate_on_commit(session, *keys):
+    """Drop ``keys`` from the cache once ``session`` commits successfully."""
+    session.info.setdefault("cache_invalidations", set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    keys = session.info.pop("cache_invalidations", None)
+    if keys:
+        cache.delete(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("cache_invalidations", None)
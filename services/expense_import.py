@@ -0,0 +1,252 @@
+import csv
+import datetime
+import io
+import json
+
+from marshmallow import ValidationError
+
+from ..models import db, User, UserTransaction, Expense, LedgerEntry
+from ..models.expense import SplitType, members_table
+from ..models.group import group_members_table
+from ..models.money import to_cents
+from .analytics import apply_rollup_deltas, expense_rollup_deltas
+from .balances import apply_transfers
+from .cache import expense_list_key, invalidate_on_commit
+from .groups import InvalidGroup
+from .splits import InvalidSplit, compute_shares_batch
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_jsonl(stream):
+    """Yield ``(row_number, record)`` from a JSON-lines byte stream."""
+    for row_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8"), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as e:
+            yield row_number, e
+
+
+def iter_csv(stream, list_fields=("owed_by", "split_values")):
+    """Yield ``(row_number, record)`` from a CSV byte stream with a header row.
+
+    List columns hold ``;`` separated values, e.g. ``owed_by=2;3``. Blank cells
+    are left out of the record, so optional columns fall back to their defaults.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+    for row_number, record in enumerate(reader, 2):
+        record = {field: value for field, value in record.items() if value}
+        for field in list_fields:
+            if field in record:
+                record[field] = record[field].split(";")
+        yield row_number, record
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            if isinstance(error, ValidationError):
+                error = error.messages
+            else:
+                error = str(error)
+            self.errors.append({"row": row_number, "error": error})
+
+    def to_dict(self):
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def import_expenses(payer_id, records, load_row, batch_size=500):
+    """Import a stream of expenses paid by ``payer_id`` in batches.
+
+    ``records`` yields ``(row_number, record)`` pairs and ``load_row`` turns a
+    record into ``CreateExpenseRequest`` kwargs or raises ``ValidationError``.
+    Each batch is written with multi-row inserts and committed on its own, so
+    memory stays bounded by ``batch_size`` whatever the size of the input.
+    """
+    report = ImportReport()
+    batch = []
+
+    for row_number, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            kwargs = load_row(record)
+            amount = to_cents(kwargs["amount"])
+        except (ValidationError, ValueError) as e:
+            report.add_error(row_number, e)
+            continue
+
+        batch.append((row_number, kwargs, amount))
+        if len(batch) >= batch_size:
+            _write_batch(payer_id, batch, report)
+            batch = []
+
+    if batch:
+        _write_batch(payer_id, batch, report)
+
+    return report
+
+
+def _write_batch(payer_id, rows, report):
+    prepared = prepare_expenses(
+        [(row_number, payer_id, kwargs, amount) for row_number, kwargs, amount in rows],
+        report,
+    )
+    if not prepared:
+        return
+
+    try:
+        insert_expenses(prepared)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for row_number, _, _, _ in prepared:
+            report.add_error(row_number, e)
+        return
+
+    report.imported += len(prepared)
+
+
+def prepare_expenses(rows, report):
+    """Validate ``(row_number, payer_id, kwargs, amount)`` rows into expenses.
+
+    Splits are computed in one batch and users and group memberships checked
+    with one query each. Invalid rows are added to ``report``; the others are
+    returned as unflushed ``(row_number, expense, kwargs, shares)``.
+    """
+    splits = compute_shares_batch(
+        [
+            (
+                kwargs["split_type"],
+                amount,
+                kwargs["owed_by"],
+                kwargs.get("split_values"),
+            )
+            for _, _, kwargs, amount in rows
+        ]
+    )
+    batch = []
+    for (row_number, payer_id, kwargs, amount), shares in zip(rows, splits):
+        if isinstance(shares, InvalidSplit):
+            report.add_error(row_number, shares)
+        else:
+            batch.append((row_number, payer_id, kwargs, amount, shares))
+
+    user_ids = {
+        user_id for _, _, kwargs, _, _ in batch for user_id in kwargs["owed_by"]
+    }
+    known_user_ids = {
+        user_id
+        for (user_id,) in db.session.query(User.id).filter(User.id.in_(user_ids))
+    }
+    group_ids = {
+        kwargs["group_id"] for _, _, kwargs, _, _ in batch if kwargs.get("group_id")
+    }
+    group_members = set()
+    if group_ids:
+        group_members = set(
+            db.session.query(
+                group_members_table.c.group_id, group_members_table.c.user_id
+            ).filter(group_members_table.c.group_id.in_(group_ids))
+        )
+
+    expenses = []
+    for row_number, payer_id, kwargs, amount, shares in batch:
+        if not known_user_ids.issuperset(kwargs["owed_by"]):
+            report.add_error(row_number, InvalidSplit("Unknown user in owed_by"))
+            continue
+        group_id = kwargs.get("group_id")
+        if group_id and not all(
+            (group_id, user_id) in group_members
+            for user_id in {payer_id, *kwargs["owed_by"]}
+        ):
+            report.add_error(
+                row_number, InvalidGroup("Every user must be a member of the group")
+            )
+            continue
+
+        expense = Expense()
+        expense.paid_by = payer_id
+        expense.amount = amount
+        expense.description = kwargs["description"]
+        expense.category = kwargs["category"]
+        expense.split_type = SplitType(kwargs["split_type"])
+        expense.date = kwargs.get("date") or datetime.date.today()
+        expense.group_id = group_id
+        expenses.append((row_number, expense, kwargs, shares))
+
+    return expenses
+
+
+def insert_expenses(prepared, fan_out=True):
+    """Write ``prepare_expenses`` output with multi-row inserts, uncommitted.
+
+    With ``fan_out=False`` only the expenses and their members are written and
+    the caller applies the shares later with ``insert_transactions``.
+    """
+    db.session.add_all([expense for _, expense, _, _ in prepared])
+    db.session.flush()
+
+    members = [
+        {"expense_id": expense.id, "user_id": user_id}
+        for _, expense, kwargs, _ in prepared
+        for user_id in set(kwargs["owed_by"])
+    ]
+    if members:
+        db.session.execute(members_table.insert(), members)
+    if fan_out:
+        insert_transactions([(expense, shares) for _, expense, _, shares in prepared])
+    invalidate_on_commit(
+        db.session,
+        *{expense_list_key(expense.paid_by) for _, expense, _, _ in prepared},
+    )
+
+
+def insert_transactions(expenses):
+    """Insert the transactions of flushed ``(expense, shares)`` pairs and apply
+    their balance and rollup effects, uncommitted.
+
+    A payer listed in ``owed_by`` keeps their own share, so no transaction is
+    recorded for it.
+    """
+    transactions = []
+    transfers = []
+    rollups = []
+    for expense, shares in expenses:
+        payer_id = expense.paid_by
+        expense_transfers = []
+        for user_id, share_amount in shares:
+            if user_id == payer_id:
+                continue
+            transactions.append(
+                {
+                    "payer_id": payer_id,
+                    "recipient_id": user_id,
+                    "expense_id": expense.id,
+                    "amount": share_amount,
+                    "description": expense.description,
+                    "created_at": expense.date,
+                }
+            )
+            expense_transfers.append((payer_id, user_id, share_amount, expense.id))
+        transfers.extend(expense_transfers)
+        rollups.append((expense, expense_transfers))
+
+    if transactions:
+        db.session.execute(UserTransaction.__table__.insert(), transactions)
+    apply_transfers(transfers, LedgerEntry.EXPENSE)
+    apply_rollup_deltas(expense_rollup_deltas(rollups))
@@ -0,0 +1,102 @@
+from ..models import db, Expense, LedgerEntry
+from ..models.money import to_cents
+from .analytics import apply_rollup_deltas, expense_rollup_deltas
+from .balances import apply_transfers
+from .cache import expense_list_key, invalidate_on_commit
+from .expense_import import insert_expenses, insert_transactions, prepare_expenses
+from .jobs import cancel_jobs, enqueue, job_handler
+
+
+class _RaisingReport:
+    """Stands in for an ``ImportReport`` and raises the first row error."""
+
+    def add_error(self, row_number, error):
+        raise error
+
+
+def ingest_expense(payer_id, defer=False, commit=True, **kwargs):
+    """Create an expense, its transactions and balance updates in one commit.
+
+    This is the bulk import path for a batch of one, so participants are
+    resolved with one ``IN`` query and transactions written with one multi-row
+    insert regardless of group size. ``InvalidSplit`` or ``InvalidGroup`` is
+    raised for a bad split. With ``defer`` only the expense is written, along
+    with an ``expense_fanout`` job that creates the rest in a worker. With
+    ``commit=False`` the writes are only flushed and the caller commits.
+    """
+    [(_, expense, _, shares)] = prepare_expenses(
+        [(None, payer_id, kwargs, to_cents(kwargs["amount"]))], _RaisingReport()
+    )
+    expense.fanned_out = not defer
+
+    try:
+        insert_expenses([(None, expense, kwargs, shares)], fan_out=not defer)
+        if defer:
+            enqueue(
+                "expense_fanout",
+                key=fanout_key(expense.id),
+                expense_id=expense.id,
+                shares=shares,
+            )
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return expense
+
+
+def fanout_key(expense_id):
+    return f"expense:{expense_id}"
+
+
+@job_handler("expense_fanout")
+def fan_out_expense(expense_id, shares):
+    """Create the transactions and balance updates of a deferred expense."""
+    expense = db.session.get(Expense, expense_id, with_for_update=True)
+    # deleted meanwhile, or already fanned out by an earlier attempt
+    if expense is None or expense.fanned_out:
+        return
+
+    insert_transactions([(expense, shares)])
+    expense.fanned_out = True
+
+
+def expense_transfers(expense, reverse=False):
+    """``(payer_id, recipient_id, amount, expense_id)`` for each transaction."""
+    return [
+        (
+            user_transaction.recipient_id if reverse else user_transaction.payer_id,
+            user_transaction.payer_id if reverse else user_transaction.recipient_id,
+            user_transaction.amount,
+            expense.id,
+        )
+        for user_transaction in expense.transactions
+    ]
+
+
+def delete_expense(expense):
+    """Delete an expense, offsetting its balance effects with reversal entries."""
+    try:
+        # locking the expense waits out a fan-out in progress
+        db.session.refresh(expense, with_for_update=True)
+        cancel_jobs(fanout_key(expense.id))
+        # an expense not fanned out yet has nothing to reverse
+        if expense.fanned_out:
+            apply_transfers(
+                expense_transfers(expense, reverse=True), LedgerEntry.REVERSAL
+            )
+            apply_rollup_deltas(
+                expense_rollup_deltas([(expense, expense_transfers(expense))], sign=-1)
+            )
+        for user_transaction in expense.transactions:
+            db.session.delete(user_transaction)
+        db.session.delete(expense)
+        invalidate_on_commit(db.session, expense_list_key(expense.paid_by))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,92 @@
+import csv
+import heapq
+import io
+import json
+
+from sqlalchemy import and_, or_
+
+from ..models import db, UserTransaction
+from ..models.money import from_cents
+
+EXPORT_FIELDS = (
+    "id",
+    "created_at",
+    "payer_id",
+    "recipient_id",
+    "expense_id",
+    "amount",
+    "description",
+)
+
+
+def iter_ledger(user_id, chunk_size=1000):
+    """Yield every transaction the user paid or received as a plain row.
+
+    The payer and recipient sides are read separately, each in
+    ``(created_at, id)`` order straight off its index, and merged. Memory stays
+    bounded by ``chunk_size`` rows per side whatever the size of the ledger.
+    """
+    return heapq.merge(
+        _iter_side(UserTransaction.payer_id, user_id, chunk_size),
+        _iter_side(UserTransaction.recipient_id, user_id, chunk_size),
+        key=lambda row: (row.created_at, row.id),
+    )
+
+
+def _iter_side(user_column, user_id, chunk_size):
+    """Rows where ``user_column`` is the user, in keyset paged chunks.
+
+    Every chunk is its own short query, so the two sides never hold open
+    cursors on the same connection at once.
+    """
+    columns = [getattr(UserTransaction, field) for field in EXPORT_FIELDS]
+    query = db.session.query(*columns).filter(user_column == user_id)
+    if user_column is UserTransaction.recipient_id:
+        # transactions to oneself are already on the payer side
+        query = query.filter(UserTransaction.payer_id != user_id)
+
+    created_at, id = UserTransaction.created_at, UserTransaction.id
+    chunk = query.order_by(created_at, id).limit(chunk_size).all()
+    while chunk:
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+        chunk = (
+            query.filter(
+                or_(
+                    created_at > last.created_at,
+                    and_(created_at == last.created_at, id > last.id),
+                )
+            )
+            .order_by(created_at, id)
+            .limit(chunk_size)
+            .all()
+        )
+
+
+def export_ledger(user_id, format="csv", chunk_size=1000):
+    """Yield the user's ledger as CSV or JSON-lines text chunks."""
+    buffer = io.StringIO()
+    if format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        write_row = writer.writerow
+    else:
+
+        def write_row(row):
+            row = dict(zip(EXPORT_FIELDS, row))
+            row["created_at"] = row["created_at"].isoformat()
+            buffer.write(json.dumps(row) + "\n")
+
+    amount_index = EXPORT_FIELDS.index("amount")
+    for count, row in enumerate(iter_ledger(user_id, chunk_size), 1):
+        row = list(row)
+        row[amount_index] = from_cents(row[amount_index])
+        write_row(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
@@ -0,0 +1,87 @@
+import datetime
+
+from sqlalchemy import func, select, union_all
+
+from ..models import db, Expense, Group, User, UserTransaction
+from ..models.group import group_members_table
+
+
+class InvalidGroup(ValueError):
+    pass
+
+
+def create_group(creator_id, name, member_ids):
+    """Create a group of ``member_ids``; the creator is always a member."""
+    member_ids = set(member_ids) | {creator_id}
+    members = User.query.filter(User.id.in_(member_ids)).all()
+    if len(members) != len(member_ids):
+        raise InvalidGroup("Unknown user in members")
+
+    group = Group()
+    group.name = name
+    group.created_by = creator_id
+    group.created_at = datetime.date.today()
+    group.members = members
+    db.session.add(group)
+    db.session.commit()
+    return group
+
+
+def is_group_member(group_id, user_id):
+    return (
+        db.session.query(group_members_table)
+        .filter_by(group_id=group_id, user_id=user_id)
+        .first()
+        is not None
+    )
+
+
+def check_group_members(group_id, user_ids):
+    """Raise ``InvalidGroup`` unless every user belongs to the group."""
+    user_ids = set(user_ids)
+    found = (
+        db.session.query(func.count())
+        .select_from(group_members_table)
+        .filter(
+            group_members_table.c.group_id == group_id,
+            group_members_table.c.user_id.in_(user_ids),
+        )
+        .scalar()
+    )
+    if found != len(user_ids):
+        raise InvalidGroup("Every user must be a member of the group")
+
+
+def group_balances(group_id):
+    """Net balance in cents per member from the group's expenses and payments.
+
+    One grouped aggregate over the transactions of the group's expenses and
+    the settle-up payments made within the group.
+    """
+    columns = (
+        UserTransaction.payer_id,
+        UserTransaction.recipient_id,
+        UserTransaction.amount,
+    )
+    group_transactions = union_all(
+        select(*columns)
+        .join(Expense, Expense.id == UserTransaction.expense_id)
+        .where(Expense.group_id == group_id),
+        select(*columns).where(UserTransaction.group_id == group_id),
+    ).subquery()
+    legs = union_all(
+        select(
+            group_transactions.c.payer_id.label("user_id"),
+            group_transactions.c.amount.label("amount"),
+        ),
+        select(
+            group_transactions.c.recipient_id.label("user_id"),
+            (-group_transactions.c.amount).label("amount"),
+        ),
+    ).subquery()
+    return {
+        user_id: int(amount)
+        for user_id, amount in db.session.execute(
+            select(legs.c.user_id, func.sum(legs.c.amount)).group_by(legs.c.user_id)
+        )
+    }
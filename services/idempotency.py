@@ -0,0 +1,100 @@
+import datetime
+import functools
+import hashlib
+import json
+import logging
+
+from flask import request
+from flask_login import current_user
+
+from ..models import IdempotencyKey, db
+from .serializers import dumps
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint():
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def idempotent(view):
+    """Make a write handler safe to retry with an ``Idempotency-Key`` header.
+
+    The handler only flushes its writes and the wrapper commits them: the key
+    row and the response it stores are part of that same commit, so a retry
+    either finds the stored response, in a single indexed lookup, or the first
+    attempt left nothing behind. Only successful responses are stored; failed
+    attempts are rolled back and may be retried. Requests without the header
+    are committed the same way, without a key row. A failed commit is rolled
+    back and answered with a 500.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        record = None
+        if key:
+            if len(key) > MAX_KEY_LENGTH:
+                return {"message": f"{HEADER} is too long", "data": {}}, 400
+
+            fingerprint = request_fingerprint()
+            replay = stored_response(current_user.id, key, fingerprint)
+            if replay is not None:
+                return replay
+
+            record = IdempotencyKey(
+                user_id=current_user.id,
+                key=key,
+                fingerprint=fingerprint,
+                created_at=datetime.datetime.utcnow(),
+            )
+            db.session.add(record)
+
+        result = view(*args, **kwargs)
+        body, status = result if isinstance(result, tuple) else (result, 200)
+
+        if status >= 400:
+            db.session.rollback()
+            if record is None:
+                return result
+            # a concurrent attempt with the same key may have won the insert
+            return stored_response(current_user.id, key, fingerprint) or result
+
+        if record is not None:
+            record.status_code = status
+            record.response = dumps(body).decode()
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Could not commit %s %s", request.method, request.path)
+            return {"message": str(e), "data": {}}, 500
+        return result
+
+    return wrapper
+
+
+def stored_response(user_id, key, fingerprint):
+    record = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+    if record is None:
+        return None
+    if record.fingerprint != fingerprint:
+        message = f"{HEADER} was already used for a different request"
+        return {"message": message, "data": {}}, 422
+    return json.loads(record.response), record.status_code
+
+
+def purge_idempotency_keys(max_age):
+    """Delete keys older than ``max_age`` (a timedelta); returns the count."""
+    cutoff = datetime.datetime.utcnow() - max_age
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    return deleted
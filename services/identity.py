@@ -0,0 +1,82 @@
+from flask import session
+from flask_login import UserMixin
+
+from ..models import db, User
+from .cache import cache
+
+IDENTITY_SESSION_KEY = "identity"
+
+
+class SessionUser(UserMixin):
+    """Current user rebuilt from the signed session, without a database row."""
+
+    def __init__(self, id, username, name, epoch):
+        self.id = id
+        self.username = username
+        self.name = name
+        self.session_epoch = epoch
+
+    def get_id(self):
+        return f"{self.id}:{self.session_epoch}"
+
+
+def session_epoch_key(user_id):
+    return f"session_epoch:{user_id}"
+
+
+def _session_epoch(user_id):
+    return cache.get_or_load(
+        session_epoch_key(user_id),
+        lambda: db.session.query(User.session_epoch).filter_by(id=user_id).scalar(),
+    )
+
+
+def remember_identity(user):
+    """Store the user's identity in the signed session cookie."""
+    session[IDENTITY_SESSION_KEY] = dict(
+        id=user.id,
+        username=user.username,
+        name=user.name,
+        epoch=user.session_epoch,
+    )
+
+
+def forget_identity():
+    session.pop(IDENTITY_SESSION_KEY, None)
+
+
+def load_identity(token):
+    """Resolve the ``<user id>:<epoch>`` token from ``User.get_id`` for Flask-Login.
+
+    Tokens whose epoch is no longer the user's current one are revoked. The
+    current epoch is read through the cache and the rest of the user comes from
+    the session identity, so most requests skip the ``users`` table. Sessions
+    without an identity, e.g. restored from the remember-me cookie, load the
+    user once and store it.
+    """
+    try:
+        user_id, epoch = (int(part) for part in token.split(":"))
+    except ValueError:
+        return None
+
+    identity = session.get(IDENTITY_SESSION_KEY)
+    if identity and identity["id"] == user_id and identity["epoch"] == epoch:
+        if epoch != _session_epoch(user_id):
+            forget_identity()
+            return None
+        return SessionUser(user_id, identity["username"], identity["name"], epoch)
+
+    user = User.query.get(user_id)
+    if not user or user.session_epoch != epoch:
+        return None
+    remember_identity(user)
+    return user
+
+
+def revoke_identities(user_id):
+    """Invalidate every session identity issued to the user so far."""
+    User.query.filter_by(id=user_id).update(
+        {User.session_epoch: User.session_epoch + 1}
+    )
+    db.session.commit()
+    cache.delete(session_epoch_key(user_id))
@@ -0,0 +1,121 @@
+import datetime
+import json
+import logging
+import time
+
+from ..models import Job, db
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register the function running jobs of ``kind``.
+
+    Handlers get the job payload as keyword arguments and must not commit:
+    their writes are committed together with the job's removal from the
+    queue. Jobs run at least once, so handlers must tolerate a rerun.
+    """
+
+    def register(handler):
+        HANDLERS[kind] = handler
+        return handler
+
+    return register
+
+
+def enqueue(kind, key=None, **payload):
+    """Add a job to the session; it is queued when the caller commits."""
+    now = datetime.datetime.utcnow()
+    job = Job(
+        kind=kind,
+        key=key,
+        payload=json.dumps(payload),
+        status=Job.PENDING,
+        attempts=0,
+        run_after=now,
+        created_at=now,
+    )
+    db.session.add(job)
+    return job
+
+
+def cancel_jobs(key):
+    """Drop the not yet finished jobs for ``key``, uncommitted; returns the count."""
+    return Job.query.filter_by(key=key).delete(synchronize_session=False)
+
+
+class Worker:
+    """Claims due jobs in batches and runs them.
+
+    Claiming leases a job for ``lease`` seconds; a worker dying mid-job lets
+    the lease expire and the job is claimed again. A failing job is retried
+    with exponential backoff and marked ``FAILED`` after ``max_attempts``.
+    """
+
+    def __init__(self, batch_size=100, lease=300, max_attempts=5):
+        self.batch_size = batch_size
+        self.lease = datetime.timedelta(seconds=lease)
+        self.max_attempts = max_attempts
+
+    def claim(self):
+        now = datetime.datetime.utcnow()
+        jobs = (
+            Job.query.filter(
+                Job.status.in_([Job.PENDING, Job.RUNNING]), Job.run_after <= now
+            )
+            .order_by(Job.run_after, Job.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for job in jobs:
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.run_after = now + self.lease
+        db.session.commit()
+        return jobs
+
+    def run(self, job):
+        """Run one claimed job; returns whether it succeeded."""
+        job_id, kind, attempts = job.id, job.kind, job.attempts
+        try:
+            HANDLERS[kind](**json.loads(job.payload))
+            # the job may have been cancelled while it ran
+            Job.query.filter_by(id=job_id).delete(synchronize_session=False)
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Job %s (%s) failed", job_id, kind)
+
+            job = db.session.get(Job, job_id)
+            if job is None:
+                return False
+            job.last_error = str(e)
+            if attempts >= self.max_attempts:
+                job.status = Job.FAILED
+            else:
+                job.status = Job.PENDING
+                job.run_after = datetime.datetime.utcnow() + datetime.timedelta(
+                    seconds=2**attempts
+                )
+            db.session.commit()
+            return False
+
+    def run_once(self):
+        """Claim and run one batch; returns ``(succeeded, failed)``."""
+        succeeded = failed = 0
+        for job in self.claim():
+            if self.run(job):
+                succeeded += 1
+            else:
+                failed += 1
+        return succeeded, failed
+
+    def run_forever(self, poll_interval=1.0):
+        while True:
+            succeeded, failed = self.run_once()
+            if not succeeded and not failed:
+                time.sleep(poll_interval)
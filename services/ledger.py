@@ -0,0 +1,124 @@
+import datetime
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from ..models import db, BalanceSnapshot, LedgerEntry
+
+# Entries younger than this may belong to a transaction that has not
+# committed yet, so snapshots never cover them.
+SNAPSHOT_LAG = datetime.timedelta(minutes=1)
+
+
+def append_entries(transfers, kind):
+    """Append ledger entries for ``(payer_id, recipient_id, amount, expense_id)``.
+
+    Entries are aggregated per user and expense and inserted with a single
+    multi-row statement; nothing is committed.
+    """
+    amounts = defaultdict(int)
+    for payer_id, recipient_id, amount, expense_id in transfers:
+        if payer_id == recipient_id:
+            continue
+        amounts[(payer_id, expense_id)] += amount
+        amounts[(recipient_id, expense_id)] -= amount
+
+    _insert_entries(amounts, kind)
+
+
+def append_adjustments(deltas):
+    """Append ADJUSTMENT entries for ``{user_id: delta}``; nothing is committed."""
+    _insert_entries(
+        {(user_id, None): delta for user_id, delta in deltas.items()},
+        LedgerEntry.ADJUSTMENT,
+    )
+
+
+def _insert_entries(amounts, kind):
+    now = datetime.datetime.utcnow()
+    rows = [
+        dict(
+            user_id=user_id,
+            amount=amount,
+            kind=kind,
+            expense_id=expense_id,
+            created_at=now,
+        )
+        for (user_id, expense_id), amount in amounts.items()
+        if amount
+    ]
+    if rows:
+        db.session.execute(LedgerEntry.__table__.insert(), rows)
+
+
+def ledger_balance(user_id):
+    """Replay the user's balance as latest snapshot plus the entries after it.
+
+    Returns ``None`` for a user without any ledger history.
+    """
+    snapshot = db.session.get(BalanceSnapshot, user_id)
+    last_entry_id = snapshot.last_entry_id if snapshot else 0
+
+    count, tail = (
+        db.session.query(func.count(LedgerEntry.id), func.sum(LedgerEntry.amount))
+        .filter(LedgerEntry.user_id == user_id, LedgerEntry.id > last_entry_id)
+        .one()
+    )
+    if not snapshot and not count:
+        return None
+    return (snapshot.balance if snapshot else 0) + int(tail or 0)
+
+
+def take_snapshots(min_tail=100):
+    """Snapshot every user with at least ``min_tail`` entries since their last one.
+
+    Returns the number of snapshots written.
+    """
+    settled_before = datetime.datetime.utcnow() - SNAPSHOT_LAG
+    upto = (
+        db.session.query(func.max(LedgerEntry.id))
+        .filter(LedgerEntry.created_at < settled_before)
+        .scalar()
+    )
+    if not upto:
+        return 0
+
+    tails = (
+        db.session.query(
+            LedgerEntry.user_id,
+            func.count(LedgerEntry.id),
+            func.sum(LedgerEntry.amount),
+        )
+        .outerjoin(BalanceSnapshot, BalanceSnapshot.user_id == LedgerEntry.user_id)
+        .filter(
+            LedgerEntry.id > func.coalesce(BalanceSnapshot.last_entry_id, 0),
+            LedgerEntry.id <= upto,
+        )
+        .group_by(LedgerEntry.user_id)
+        .having(func.count(LedgerEntry.id) >= min_tail)
+        .all()
+    )
+    if not tails:
+        return 0
+
+    snapshots = {
+        snapshot.user_id: snapshot
+        for snapshot in BalanceSnapshot.query.filter(
+            BalanceSnapshot.user_id.in_([user_id for user_id, _, _ in tails])
+        )
+    }
+    now = datetime.datetime.utcnow()
+    for user_id, _, tail in tails:
+        snapshot = snapshots.get(user_id)
+        if not snapshot:
+            snapshot = BalanceSnapshot()
+            snapshot.user_id = user_id
+            snapshot.balance = 0
+            db.session.add(snapshot)
+
+        snapshot.balance += int(tail)
+        snapshot.last_entry_id = upto
+        snapshot.created_at = now
+
+    db.session.commit()
+    return len(tails)
@@ -0,0 +1,180 @@
+import bisect
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, Prometheus style."""
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self.series.items()):
+            label_text = format_labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}'
+            cumulative += counts[-1]
+            yield f'{self.name}_bucket{{{label_text},le="+Inf"}} {cumulative}'
+            yield f"{self.name}_sum{{{label_text}}} {total}"
+            yield f"{self.name}_count{{{label_text}}} {cumulative}"
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.series.items()):
+            yield f"{self.name}{{{format_labels(labels)}}} {value}"
+
+
+def format_labels(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+class Metrics:
+    """Request and database metrics, exposed in Prometheus text format.
+
+    Every request records its latency, the number of SQL statements it ran and
+    the time spent in them, labelled by resource and method. Statements slower
+    than ``SLOW_QUERY_THRESHOLD`` and requests slower than
+    ``SLOW_REQUEST_THRESHOLD`` (seconds) are logged as warnings.
+    """
+
+    def __init__(self):
+        self.slow_query_threshold = 0.1
+        self.slow_request_threshold = 1.0
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            "http_request_duration_seconds",
+            "Request latency by resource.",
+            LATENCY_BUCKETS,
+        )
+        self.queries = Histogram(
+            "http_request_db_queries",
+            "SQL statements executed per request.",
+            QUERY_BUCKETS,
+        )
+        self.db_time = Histogram(
+            "http_request_db_seconds",
+            "Time spent in SQL statements per request.",
+            LATENCY_BUCKETS,
+        )
+        self.responses = Counter(
+            "http_responses_total", "Responses by resource and status code."
+        )
+        self.slow_queries = Counter(
+            "db_slow_queries_total", "SQL statements over the slow query threshold."
+        )
+
+    def init_app(self, app):
+        self.slow_query_threshold = app.config.get("SLOW_QUERY_THRESHOLD", 0.1)
+        self.slow_request_threshold = app.config.get("SLOW_REQUEST_THRESHOLD", 1.0)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_time = 0.0
+
+    def _finish_request(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        resource = resource_name()
+        labels = (("method", request.method), ("resource", resource))
+        with self._lock:
+            self.latency.observe(labels, elapsed)
+            self.queries.observe(labels, g.metrics_queries)
+            self.db_time.observe(labels, g.metrics_db_time)
+            self.responses.inc(labels + (("status", response.status_code),))
+        if elapsed > self.slow_request_threshold:
+            logger.warning(
+                "slow request %s %s: %.1fms, %d queries, %.1fms in db",
+                request.method,
+                request.path,
+                elapsed * 1000,
+                g.metrics_queries,
+                g.metrics_db_time * 1000,
+            )
+        return response
+
+    def record_query(self, statement, elapsed):
+        if has_request_context() and "metrics_started" in g:
+            g.metrics_queries += 1
+            g.metrics_db_time += elapsed
+        if elapsed > self.slow_query_threshold:
+            with self._lock:
+                self.slow_queries.inc((("resource", resource_name()),))
+            logger.warning("slow query %.1fms: %s", elapsed * 1000, statement)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (
+                self.latency,
+                self.queries,
+                self.db_time,
+                self.responses,
+                self.slow_queries,
+            ):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def resource_name():
+    if not has_request_context():
+        return "none"
+    view = current_app.view_functions.get(request.endpoint)
+    # flask-restful views carry the MethodResource class they dispatch to
+    return getattr(view, "view_class", view).__name__ if view else "unmatched"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is not None:
+        metrics.record_query(statement, time.perf_counter() - started)
@@ -0,0 +1,46 @@
+import base64
+import datetime
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(date, id):
+    value = f"{date.isoformat()}:{id}".encode()
+    return base64.urlsafe_b64encode(value).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        date, id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return datetime.date.fromisoformat(date), int(id)
+    except ValueError:
+        raise InvalidCursor("Invalid cursor")
+
+
+def paginate_keyset(query, date_column, id_column, cursor=None, limit=50):
+    """Return one page of ``query`` newest first and the cursor of the next page.
+
+    Pages are addressed by the last ``(date, id)`` seen instead of an offset, so
+    with an index ending in ``(date, id)`` every page costs the same to serve.
+    """
+    if cursor:
+        date, id = decode_cursor(cursor)
+        query = query.filter(
+            or_(date_column < date, and_(date_column == date, id_column < id))
+        )
+
+    rows = query.order_by(date_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, date_column.key), getattr(last, id_column.key)
+        )
+
+    return rows, next_cursor
@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from ..models import db
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Count the SQL statements executed on ``engine`` inside the block.
+
+    Meant for asserting how many queries an endpoint issues, e.g.::
+
+        with count_queries() as counter:
+            client.get("/expenses")
+        assert counter.count <= 2, counter.statements
+    """
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
@@ -0,0 +1,101 @@
+from sqlalchemy import func, select, union_all
+
+from ..models import db, LedgerEntry, User, UserBalance, UserTransaction
+from .balances import apply_balance_deltas
+from .cache import balance_key, invalidate_on_commit
+from .ledger import append_adjustments
+
+
+def expected_balances_query(first_user_id, last_user_id):
+    """Net balance per user implied by ``transactions``, as one grouped aggregate.
+
+    Only users with ids in ``[first_user_id, last_user_id]`` are aggregated;
+    the range is applied to each side so the payer and recipient indexes
+    bound the scan.
+    """
+    legs = union_all(
+        select(
+            UserTransaction.payer_id.label("user_id"),
+            UserTransaction.amount.label("amount"),
+        ).where(UserTransaction.payer_id.between(first_user_id, last_user_id)),
+        select(
+            UserTransaction.recipient_id.label("user_id"),
+            (-UserTransaction.amount).label("amount"),
+        ).where(UserTransaction.recipient_id.between(first_user_id, last_user_id)),
+    ).subquery()
+    return select(legs.c.user_id, func.sum(legs.c.amount)).group_by(legs.c.user_id)
+
+
+def reconcile_balances(chunk_size=10000, dry_run=False, progress=None):
+    """Repair balances that drifted from what ``transactions`` imply.
+
+    Users are walked in id order ``chunk_size`` at a time, so every transaction
+    is aggregated exactly once and memory is bounded by the chunk. Each chunk is
+    diffed against ``balances`` and the ledger with one grouped query each, then
+    repaired with one batched write to ``balances`` and ADJUSTMENT ledger
+    entries. ``progress(checked, repaired)`` is called after every chunk.
+    Returns the totals as ``(checked, repaired)``.
+    """
+    checked = repaired = 0
+    last_user_id = 0
+
+    while True:
+        user_ids = [
+            user_id
+            for (user_id,) in db.session.query(User.id)
+            .filter(User.id > last_user_id)
+            .order_by(User.id)
+            .limit(chunk_size)
+        ]
+        if not user_ids:
+            break
+
+        expected = dict.fromkeys(user_ids, 0)
+        for user_id, amount in db.session.execute(
+            expected_balances_query(user_ids[0], user_ids[-1])
+        ):
+            expected[user_id] = int(amount)
+
+        repaired += _repair(expected, dry_run)
+        checked += len(user_ids)
+        last_user_id = user_ids[-1]
+        if progress:
+            progress(checked, repaired)
+
+    return checked, repaired
+
+
+def _diff(expected, stored):
+    return {
+        user_id: balance - int(stored.get(user_id, 0))
+        for user_id, balance in expected.items()
+        if balance != stored.get(user_id, 0)
+    }
+
+
+def _repair(expected, dry_run):
+    balance_deltas = _diff(
+        expected,
+        dict(
+            db.session.query(UserBalance.user_id, UserBalance.balance).filter(
+                UserBalance.user_id.in_(expected)
+            )
+        ),
+    )
+    ledger_deltas = _diff(
+        expected,
+        dict(
+            db.session.query(LedgerEntry.user_id, func.sum(LedgerEntry.amount))
+            .filter(LedgerEntry.user_id.in_(expected))
+            .group_by(LedgerEntry.user_id)
+        ),
+    )
+    if not dry_run and (balance_deltas or ledger_deltas):
+        apply_balance_deltas(balance_deltas)
+        append_adjustments(ledger_deltas)
+        invalidate_on_commit(
+            db.session,
+            *(balance_key(user_id) for user_id in {**balance_deltas, **ledger_deltas}),
+        )
+        db.session.commit()
+    return len(balance_deltas.keys() | ledger_deltas.keys())
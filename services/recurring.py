@@ -0,0 +1,145 @@
+import calendar
+import datetime
+import logging
+
+from ..models import db, RecurringExpense, User
+from ..models.expense import SplitType
+from ..models.money import to_cents
+from ..models.recurring_expense import Frequency
+from .expense_import import ImportReport, insert_expenses, prepare_expenses
+from .groups import check_group_members
+from .splits import InvalidSplit, compute_shares
+
+logger = logging.getLogger(__name__)
+
+# occurrences materialized per template and pass, so a long overdue daily
+# template cannot blow up a batch; the rest follows in the next pass
+MAX_CATCH_UP = 31
+
+
+def occurrence_date(start_date, frequency, steps):
+    """Date ``steps`` days, weeks or months after ``start_date``.
+
+    Monthly dates keep the start's day of month, clamped to shorter months.
+    """
+    frequency = Frequency(frequency)
+    if frequency == Frequency.DAILY:
+        return start_date + datetime.timedelta(days=steps)
+    if frequency == Frequency.WEEKLY:
+        return start_date + datetime.timedelta(weeks=steps)
+
+    month_index = start_date.month - 1 + steps
+    year, month = start_date.year + month_index // 12, month_index % 12 + 1
+    day = min(start_date.day, calendar.monthrange(year, month)[1])
+    return datetime.date(year, month, day)
+
+
+def create_recurring_expense(payer_id, **kwargs):
+    """Validate and store a recurring expense template, first run included."""
+    owed_by = kwargs["owed_by"]
+    compute_shares(
+        kwargs["split_type"],
+        to_cents(kwargs["amount"]),
+        owed_by,
+        kwargs.get("split_values"),
+    )
+    found = User.query.filter(User.id.in_(set(owed_by))).count()
+    if found != len(set(owed_by)):
+        raise InvalidSplit("Unknown user in owed_by")
+    if kwargs.get("group_id"):
+        check_group_members(kwargs["group_id"], {payer_id, *owed_by})
+
+    template = RecurringExpense()
+    template.paid_by = payer_id
+    template.amount = to_cents(kwargs["amount"])
+    template.description = kwargs["description"]
+    template.category = kwargs["category"]
+    template.split_type = SplitType(kwargs["split_type"])
+    template.owed_by = owed_by
+    template.split_values = kwargs.get("split_values")
+    template.group_id = kwargs.get("group_id")
+    template.frequency = Frequency(kwargs["frequency"])
+    template.every = kwargs["every"]
+    template.start_date = kwargs.get("start_date") or datetime.date.today()
+    template.end_date = kwargs.get("end_date")
+    template.occurrences = 0
+    template.next_run = template.start_date
+    if template.end_date and template.end_date < template.start_date:
+        template.next_run = None
+
+    db.session.add(template)
+    db.session.commit()
+    return template
+
+
+def _advance(template):
+    template.occurrences += 1
+    next_run = occurrence_date(
+        template.start_date, template.frequency, template.every * template.occurrences
+    )
+    if template.end_date and next_run > template.end_date:
+        next_run = None
+    template.next_run = next_run
+
+
+def materialize_due(today=None, batch_size=500, progress=None):
+    """Create the expenses of every template due on or before ``today``.
+
+    Due templates are found through the ``next_run`` index ``batch_size`` at a
+    time and locked, so concurrent schedulers skip each other's work. Each
+    batch of occurrences is written with multi-row inserts and committed with
+    the templates' new ``next_run``, so no occurrence is created twice.
+    Occurrences that no longer validate, e.g. a member left the group, are
+    skipped and logged. Returns ``(created, skipped)``.
+    """
+    today = today or datetime.date.today()
+    created = skipped = 0
+
+    while True:
+        templates = (
+            RecurringExpense.query.filter(RecurringExpense.next_run <= today)
+            .order_by(RecurringExpense.next_run, RecurringExpense.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not templates:
+            break
+
+        rows = []
+        for template in templates:
+            for _ in range(MAX_CATCH_UP):
+                if template.next_run is None or template.next_run > today:
+                    break
+                kwargs = dict(
+                    description=template.description,
+                    category=template.category,
+                    split_type=template.split_type.value,
+                    owed_by=template.owed_by,
+                    split_values=template.split_values,
+                    group_id=template.group_id,
+                    date=template.next_run,
+                )
+                rows.append((template.id, template.paid_by, kwargs, template.amount))
+                _advance(template)
+
+        report = ImportReport()
+        prepared = prepare_expenses(rows, report)
+        try:
+            if prepared:
+                insert_expenses(prepared)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for error in report.errors:
+            logger.warning(
+                "Skipped recurring expense %s: %s", error["row"], error["error"]
+            )
+        created += len(prepared)
+        skipped += report.failed
+        if progress:
+            progress(created, skipped)
+
+    return created, skipped
@@ -0,0 +1,102 @@
+import re
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import selectinload
+
+from ..models import db, Expense, User, create_search_index
+from ..models.expense import members_table
+from ..models.search import expenses_fts
+
+TERM = re.compile(r"\w+")
+MAX_TERMS = 8
+# shorter prefixes match too much of the index to stay fast
+MIN_PREFIX = 3
+
+
+def search_terms(q):
+    """Lowercased words of the query; punctuation never reaches the index syntax."""
+    return TERM.findall(q.lower())[:MAX_TERMS]
+
+
+def _index_terms(terms):
+    """``(term, is_prefix)`` pairs, only the last term is still being typed."""
+    last = len(terms) - 1
+    return [
+        (term, i == last and len(term) >= MIN_PREFIX) for i, term in enumerate(terms)
+    ]
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _description_matches(terms):
+    """Expenses whose description has every term as a word, the last as a prefix."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        against = " ".join(
+            f"+{term}*" if prefix else f"+{term}"
+            for term, prefix in _index_terms(terms)
+        )
+        return mysql.match(Expense.description, against=against).in_boolean_mode()
+    if dialect == "sqlite":
+        query = " ".join(
+            f'"{term}"*' if prefix else f'"{term}"'
+            for term, prefix in _index_terms(terms)
+        )
+        return Expense.id.in_(
+            select(expenses_fts.c.rowid).where(expenses_fts.c.description.match(query))
+        )
+    # no inverted index on other databases, this scans the expenses
+    return and_(
+        *(
+            Expense.description.ilike(f"%{_escape_like(term)}%", escape="\\")
+            for term in terms
+        )
+    )
+
+
+def search_expenses(user_id, q, limit):
+    """Newest expenses the user paid for or owes whose description matches."""
+    terms = search_terms(q)
+    if not terms:
+        return []
+    member_of = select(members_table.c.expense_id).where(
+        members_table.c.user_id == user_id
+    )
+    return (
+        Expense.query.filter(
+            _description_matches(terms),
+            or_(Expense.paid_by == user_id, Expense.id.in_(member_of)),
+        )
+        .options(selectinload(Expense.owed_by))
+        .order_by(Expense.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def search_users(q, limit):
+    """Users whose username or name starts with ``q``, for picking ``owed_by``."""
+    prefix = q.strip()
+    if not prefix:
+        return []
+    pattern = f"{_escape_like(prefix)}%"
+    return (
+        User.query.filter(
+            or_(
+                User.username.like(pattern, escape="\\"),
+                User.name.like(pattern, escape="\\"),
+            )
+        )
+        .order_by(User.username)
+        .limit(limit)
+        .all()
+    )
+
+
+def rebuild_search_index():
+    """Create and fill the expense search index of an existing database."""
+    create_search_index(db.session.connection())
+    db.session.commit()
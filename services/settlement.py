@@ -0,0 +1,61 @@
+import heapq
+
+from sqlalchemy import func
+
+from ..models import db, UserBalance, UserTransaction
+
+def simplify_debts(balances):
+    """Return a near-minimal list of ``(from_user, to_user, amount)`` transfers.
+
+    ``balances`` maps user id to net balance in cents, positive when the user
+    is owed money. The largest debtor always pays the largest creditor, so every
+    transfer settles at least one side and at most ``n - 1`` transfers are
+    produced in ``O(n log n)``.
+    """
+    creditors = []
+    debtors = []
+    for user_id, balance in balances.items():
+        if balance > 0:
+            creditors.append((-balance, user_id))
+        elif balance < 0:
+            debtors.append((balance, user_id))
+
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, creditor_id = heapq.heappop(creditors)
+        debt, debtor_id = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor_id, creditor_id, amount))
+
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor_id))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor_id))
+
+    return transfers
+
+
+def balances_from_table():
+    """Net balance in cents per user as stored in ``balances``."""
+    return dict(db.session.query(UserBalance.user_id, UserBalance.balance))
+
+
+def balances_from_transactions():
+    """Net balance in cents per user aggregated from ``transactions``.
+
+    The payer of a transaction is owed its amount by the recipient.
+    """
+    balances = {
+        user_id: int(amount)
+        for user_id, amount in db.session.query(
+            UserTransaction.payer_id, func.sum(UserTransaction.amount)
+        ).group_by(UserTransaction.payer_id)
+    }
+    for user_id, amount in db.session.query(
+        UserTransaction.recipient_id, func.sum(UserTransaction.amount)
+    ).group_by(UserTransaction.recipient_id):
+        balances[user_id] = balances.get(user_id, 0) - int(amount)
+    return balances
@@ -0,0 +1,181 @@
+from collections import defaultdict
+
+from ..models.expense import SplitType
+from ..models.money import allocate, to_cents, to_decimal
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional speedup
+    np = None
+
+# vectorized rows must keep every intermediate product inside int64
+INT64_SAFE = 2**62
+
+
+class InvalidSplit(ValueError):
+    pass
+
+
+def split_equal(amount, owed_by, split_values=None):
+    # the payer is an implicit extra member placed first, so it absorbs any
+    # leftover cent before the users in owed_by do
+    share, leftover = divmod(amount, len(owed_by) + 1)
+    return [
+        (user_id, share + (position < leftover))
+        for position, user_id in enumerate(owed_by, start=1)
+    ]
+
+
+def split_percentage(amount, owed_by, split_values):
+    percentages = [to_decimal(percentage) for percentage in split_values]
+    if sum(percentages) != 100:
+        raise InvalidSplit("Invalid split values")
+    return list(zip(owed_by, allocate(amount, percentages)))
+
+
+def split_exact(amount, owed_by, split_values):
+    shares = [to_cents(share_amount) for share_amount in split_values]
+    if sum(shares) != amount:
+        raise InvalidSplit("Invalid split values")
+    return list(zip(owed_by, shares))
+
+
+SPLITTERS = {
+    SplitType.EQUAL: split_equal,
+    SplitType.PERCENTAGE: split_percentage,
+    SplitType.EXACT: split_exact,
+}
+
+
+def compute_shares(split_type, amount, owed_by, split_values=None):
+    """Return ``[(user_id, share), ...]`` in cents for an ``amount`` in cents.
+
+    For EQUAL splits the payer is an implicit extra member placed first, so
+    the payer absorbs any leftover cent before the users in ``owed_by`` do.
+    Shares always add up to ``amount`` exactly.
+    """
+    split_type = SplitType(split_type)
+    if split_type != SplitType.EQUAL and (
+        not split_values or len(split_values) != len(owed_by)
+    ):
+        raise InvalidSplit("Invalid split values")
+    return SPLITTERS[split_type](amount, owed_by, split_values)
+
+
+def compute_shares_batch(splits):
+    """``compute_shares`` for many ``(split_type, amount, owed_by, split_values)``.
+
+    Returns one entry per split, in order: its shares, or the ``InvalidSplit``
+    it failed with. Splits are grouped by type and, when NumPy is installed,
+    EQUAL and PERCENTAGE groups are computed in a single vectorized pass;
+    EXACT splits are bound by the decimal conversion of their values and stay
+    scalar. The results are the same as ``compute_shares`` either way.
+    """
+    results = [None] * len(splits)
+    groups = defaultdict(list)
+    for index, (split_type, amount, owed_by, split_values) in enumerate(splits):
+        try:
+            split_type = SplitType(split_type)
+        except ValueError as e:
+            results[index] = InvalidSplit(str(e))
+            continue
+        if split_type != SplitType.EQUAL and (
+            not split_values or len(split_values) != len(owed_by)
+        ):
+            results[index] = InvalidSplit("Invalid split values")
+            continue
+        groups[split_type].append(index)
+
+    for split_type, indexes in groups.items():
+        vectorized = VECTORIZED.get(split_type) if np is not None else None
+        if vectorized:
+            # splits without members or with amounts past int64 stay scalar
+            fits = [
+                index
+                for index in indexes
+                if splits[index][2] and abs(splits[index][1]) < INT64_SAFE
+            ]
+            if fits:
+                shares = vectorized([splits[index] for index in fits])
+                for index, result in zip(fits, shares):
+                    results[index] = result
+            indexes = [index for index in indexes if results[index] is None]
+        for index in indexes:
+            results[index] = _compute_or_error(*splits[index])
+    return results
+
+
+def _compute_or_error(split_type, amount, owed_by, split_values):
+    try:
+        return compute_shares(split_type, amount, owed_by, split_values)
+    except InvalidSplit as e:
+        return e
+
+
+def _flatten(batch):
+    counts = np.array([len(owed_by) for _, _, owed_by, _ in batch])
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rows = np.repeat(np.arange(len(batch)), counts)
+    # position of every member within its own split, from 0
+    positions = np.arange(counts.sum()) - starts[rows]
+    amounts = np.array([amount for _, amount, _, _ in batch], dtype=np.int64)
+    return counts, starts, rows, positions, amounts
+
+
+def _unflatten(batch, starts, shares):
+    return [
+        list(zip(owed_by, shares[start : start + len(owed_by)]))
+        for start, (_, _, owed_by, _) in zip(starts.tolist(), batch)
+    ]
+
+
+def _vectorized_equal(batch):
+    counts, starts, rows, positions, amounts = _flatten(batch)
+    share, leftover = np.divmod(amounts, counts + 1)
+    shares = share[rows] + (positions + 1 < leftover[rows])
+    return _unflatten(batch, starts, shares.tolist())
+
+
+def _vectorized_percentage(batch):
+    results = [None] * len(batch)
+    vectorized = []
+    weights = []
+    totals = []
+    for index, split in enumerate(batch):
+        percentages = [to_decimal(percentage) for percentage in split[3]]
+        if sum(percentages) != 100:
+            results[index] = InvalidSplit("Invalid split values")
+            continue
+        # integer weights keep the rounding exact; rows too large for int64
+        # fall back to allocate
+        scale = 10 ** max(-min(p.as_tuple().exponent for p in percentages), 0)
+        if abs(split[1]) * 100 * scale >= INT64_SAFE:
+            results[index] = _compute_or_error(*split)
+            continue
+        vectorized.append(index)
+        weights.extend(int(p * scale) for p in percentages)
+        totals.append(100 * scale)
+
+    if vectorized:
+        subset = [batch[index] for index in vectorized]
+        counts, starts, rows, positions, amounts = _flatten(subset)
+        totals = np.array(totals, dtype=np.int64)
+
+        # same largest-remainder rounding as allocate
+        products = amounts[rows] * np.array(weights, dtype=np.int64)
+        shares, remainders = np.divmod(products, totals[rows])
+        leftover = amounts - np.add.reduceat(shares, starts)
+        order = np.lexsort((positions, -remainders, rows))
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order)) - starts[rows[order]]
+        shares += rank < leftover[rows]
+        shares = _unflatten(subset, starts, shares.tolist())
+        for index, result in zip(vectorized, shares):
+            results[index] = result
+    return results
+
+
+VECTORIZED = {
+    SplitType.EQUAL: _vectorized_equal,
+    SplitType.PERCENTAGE: _vectorized_percentage,
+}
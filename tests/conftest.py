@@ -0,0 +1,52 @@
+import importlib.util
+import pathlib
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+# the repository root is the ``splitwise`` package itself
+if "splitwise" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "splitwise", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["splitwise"] = module
+    spec.loader.exec_module(module)
+
+from splitwise import create_app  # noqa: E402
+from splitwise.models import db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def signup(app):
+    """Return a client logged in as a new user named ``username``."""
+
+    def signup(username):
+        client = app.test_client()
+        response = client.post(
+            "/signup",
+            json=dict(
+                username=username,
+                name=username.title(),
+                email=f"{username}@example.com",
+                mobile_number="9999999999",
+                password="password",
+            ),
+        )
+        assert response.status_code == 200, response.json
+        return client
+
+    return signup
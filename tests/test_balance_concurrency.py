@@ -0,0 +1,112 @@
+import collections
+import random
+import threading
+
+import pytest
+
+from splitwise import create_app
+from splitwise.models import db, PairwiseBalance, UserBalance
+from splitwise.services import ledger_balance, reconcile_balances
+
+USERS = 6
+THREADS = 8
+WRITES_PER_THREAD = 25
+
+
+@pytest.fixture
+def app(tmp_path):
+    # a file database, so every thread gets its own connection
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'stress.db'}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 60}},
+            "PASSWORD_HASH_WORKERS": 0,
+            "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        }
+    )
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def login(app, user_id):
+    client = app.test_client()
+    response = client.post(
+        "/login", json=dict(username=f"user{user_id}", password="password")
+    )
+    assert response.status_code == 200, response.json
+    return client
+
+
+def write(app, seed, failures):
+    rnd = random.Random(seed)
+    clients = {user_id: login(app, user_id) for user_id in range(1, USERS + 1)}
+    for _ in range(WRITES_PER_THREAD):
+        payer = rnd.randint(1, USERS)
+        others = [user_id for user_id in clients if user_id != payer]
+        if rnd.random() < 0.5:
+            response = clients[payer].post(
+                "/expenses",
+                json=dict(
+                    amount=rnd.randint(1, 10000) / 100,
+                    description="stress",
+                    category="food",
+                    split_type="EQUAL",
+                    owed_by=rnd.sample(others, rnd.randint(1, len(others))),
+                ),
+            )
+        else:
+            response = clients[payer].post(
+                "/transactions",
+                json=dict(
+                    recipient_id=rnd.choice(others),
+                    amount=rnd.randint(1, 5000) / 100,
+                    description="stress",
+                ),
+            )
+        if response.status_code != 200:
+            failures.append(response.json)
+
+
+def test_concurrent_expenses_and_payments_keep_balances_consistent(app):
+    for user_id in range(1, USERS + 1):
+        app.test_client().post(
+            "/signup",
+            json=dict(
+                username=f"user{user_id}",
+                name=f"User {user_id}",
+                email=f"user{user_id}@example.com",
+                mobile_number="9999999999",
+                password="password",
+            ),
+        )
+
+    failures = []
+    threads = [
+        threading.Thread(target=write, args=(app, seed, failures))
+        for seed in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+
+    with app.app_context():
+        balances = dict(db.session.query(UserBalance.user_id, UserBalance.balance))
+        assert len(balances) == USERS
+        assert sum(balances.values()) == 0
+        for user_id, balance in balances.items():
+            assert ledger_balance(user_id) == balance
+
+        pairwise = collections.Counter()
+        for row in PairwiseBalance.query:
+            pairwise[row.user_a] += row.net
+            pairwise[row.user_b] -= row.net
+        assert dict(pairwise) == balances
+
+        assert reconcile_balances(dry_run=True) == (USERS, 0)
@@ -0,0 +1,11 @@
+import pytest
+
+from splitwise import create_app
+from splitwise.config import ProductionConfig
+
+
+def test_production_requires_a_secret_key(monkeypatch):
+    monkeypatch.setattr(ProductionConfig, "SECRET_KEY", None)
+
+    with pytest.raises(RuntimeError, match="SECRET_KEY"):
+        create_app("production")
@@ -0,0 +1,84 @@
+import datetime
+import io
+
+from splitwise.models import Expense
+from splitwise.services import iter_csv
+
+HEADER = "amount,description,category,split_type,owed_by,split_values,date,group_id"
+
+
+def test_iter_csv_drops_blank_cells():
+    stream = io.BytesIO(f"{HEADER}\n30,Dinner,food,EQUAL,2;3,,,\n".encode())
+
+    assert list(iter_csv(stream)) == [
+        (
+            2,
+            {
+                "amount": "30",
+                "description": "Dinner",
+                "category": "food",
+                "split_type": "EQUAL",
+                "owed_by": ["2", "3"],
+            },
+        )
+    ]
+
+
+def test_csv_import_with_blank_optional_columns(app, signup):
+    alice = signup("alice")
+    signup("bob")
+    body = "\n".join(
+        [
+            HEADER,
+            "30,Dinner,food,EQUAL,2,,,",
+            "20,Taxi,travel,EXACT,2,20,2024-01-05,",
+        ]
+    )
+
+    response = alice.post("/expenses/bulk", data=body, content_type="text/csv")
+
+    assert response.status_code == 200
+    assert response.json["data"]["imported"] == 2
+    assert response.json["data"]["errors"] == []
+    with app.app_context():
+        expenses = {expense.description: expense for expense in Expense.query}
+        assert expenses["Dinner"].date == datetime.date.today()
+        assert expenses["Dinner"].group_id is None
+        assert expenses["Taxi"].date == datetime.date(2024, 1, 5)
+
+
+def test_amount_past_limit_fails_only_its_row(app, signup):
+    alice = signup("alice")
+    signup("bob")
+    body = "\n".join(
+        [
+            '{"amount": 1e17, "description": "Huge", "category": "x", '
+            '"split_type": "EQUAL", "owed_by": [2]}',
+            '{"amount": 30, "description": "Dinner", "category": "food", '
+            '"split_type": "EQUAL", "owed_by": [2]}',
+        ]
+    )
+
+    response = alice.post(
+        "/expenses/bulk", data=body, content_type="application/x-ndjson"
+    )
+
+    assert response.status_code == 200
+    assert response.json["data"]["imported"] == 1
+    assert [error["row"] for error in response.json["data"]["errors"]] == [1]
+    with app.app_context():
+        assert [expense.description for expense in Expense.query] == ["Dinner"]
+
+
+def test_create_expense_rejects_amount_past_limit(signup):
+    alice = signup("alice")
+    signup("bob")
+
+    response = alice.post(
+        "/expenses",
+        json=dict(
+            amount=1e17, description="Huge", category="x", split_type="EQUAL", owed_by=[2]
+        ),
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,56 @@
+import csv
+import datetime
+import io
+
+from splitwise.models import db, UserTransaction
+from splitwise.services import export_ledger, iter_ledger
+
+
+def add_transactions(app):
+    """Payments both ways between users 1, 2 and 3 over a few days."""
+    with app.app_context():
+        start = datetime.date(2024, 1, 1)
+        for i in range(40):
+            payer, recipient = [(1, 2), (2, 1), (3, 1), (2, 3)][i % 4]
+            db.session.add(
+                UserTransaction(
+                    payer_id=payer,
+                    recipient_id=recipient,
+                    amount=100 + i,
+                    description=f"t{i}",
+                    created_at=start + datetime.timedelta(days=i % 5),
+                )
+            )
+        db.session.commit()
+
+
+def test_iter_ledger_merges_both_sides_in_order(app, signup):
+    for name in ("alice", "bob", "carol"):
+        signup(name)
+    add_transactions(app)
+
+    with app.app_context():
+        expected = [
+            (t.id, t.created_at)
+            for t in UserTransaction.query.filter(
+                (UserTransaction.payer_id == 1) | (UserTransaction.recipient_id == 1)
+            ).order_by(UserTransaction.created_at, UserTransaction.id)
+        ]
+        rows = list(iter_ledger(1, chunk_size=3))
+
+    assert [(row.id, row.created_at) for row in rows] == expected
+    assert len(expected) == 30
+
+
+def test_export_ledger_csv(app, signup):
+    for name in ("alice", "bob", "carol"):
+        signup(name)
+    add_transactions(app)
+
+    with app.app_context():
+        body = "".join(export_ledger(2, "csv", chunk_size=4))
+
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert len(rows) == 30
+    assert {"1", "2", "3"} >= {row["payer_id"] for row in rows}
+    assert all("2" in (row["payer_id"], row["recipient_id"]) for row in rows)
@@ -0,0 +1,75 @@
+import pytest
+
+
+@pytest.fixture
+def flat(signup):
+    """Alice, Bob and Carol in a group where Alice paid 30 split equally."""
+    alice, bob, carol = signup("alice"), signup("bob"), signup("carol")
+    group = alice.post("/groups", json=dict(name="flat", members=[2, 3]))
+    group_id = group.json["data"]["id"]
+    response = alice.post(
+        "/expenses",
+        json=dict(
+            amount=30,
+            description="Groceries",
+            category="food",
+            split_type="EQUAL",
+            owed_by=[2, 3],
+            group_id=group_id,
+        ),
+    )
+    assert response.status_code == 200
+    return group_id, alice, bob, carol
+
+
+def settlements(client, group_id):
+    response = client.get(f"/groups/{group_id}/settlements")
+    return sorted(
+        (s["payer_id"], s["recipient_id"], s["amount"])
+        for s in response.json["data"]["settlements"]
+    )
+
+
+def balances(client, group_id):
+    response = client.get(f"/groups/{group_id}/balances")
+    return {b["user_id"]: b["balance"] for b in response.json["data"]["balances"]}
+
+
+def test_settle_up_payment_clears_group_debt(flat):
+    group_id, alice, bob, carol = flat
+    assert settlements(alice, group_id) == [(2, 1, 10.0), (3, 1, 10.0)]
+
+    response = bob.post(
+        "/transactions",
+        json=dict(recipient_id=1, amount=10, description="settle", group_id=group_id),
+    )
+    assert response.status_code == 200
+    assert response.json["data"]["group_id"] == group_id
+    assert settlements(alice, group_id) == [(3, 1, 10.0)]
+
+    carol.post(
+        "/transactions",
+        json=dict(recipient_id=1, amount=10, description="settle", group_id=group_id),
+    )
+    assert settlements(alice, group_id) == []
+    assert set(balances(alice, group_id).values()) == {0}
+
+
+def test_payment_outside_group_does_not_change_group_debt(flat):
+    group_id, alice, bob, _ = flat
+    bob.post("/transactions", json=dict(recipient_id=1, amount=10, description="x"))
+
+    assert settlements(alice, group_id) == [(2, 1, 10.0), (3, 1, 10.0)]
+
+
+def test_group_payment_requires_members(flat, signup):
+    group_id, alice, _, _ = flat
+    dave = signup("dave")
+
+    response = dave.post(
+        "/transactions",
+        json=dict(recipient_id=1, amount=10, description="x", group_id=group_id),
+    )
+
+    assert response.status_code == 400
+    assert settlements(alice, group_id) == [(2, 1, 10.0), (3, 1, 10.0)]
@@ -0,0 +1,57 @@
+import pytest
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from splitwise import create_app
+from splitwise.models import db, User
+from splitwise.models.hashing import PasswordHasher
+
+
+@pytest.mark.parametrize(
+    "method, stale",
+    [
+        ("pbkdf2:sha256", "pbkdf2:sha256:1000"),
+        ("pbkdf2:sha256:1000", "pbkdf2:sha256:2000"),
+        ("scrypt", "scrypt:16384:8:1"),
+    ],
+)
+def test_needs_rehash_fills_in_default_costs(method, stale):
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=0)
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+
+    assert not hasher.needs_rehash(hasher.hash("password"))
+    assert hasher.needs_rehash(generate_password_hash("password", stale))
+
+
+@pytest.fixture
+def app():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+            "PASSWORD_HASH_WORKERS": 0,
+            "PASSWORD_HASH_METHOD": "scrypt",
+        }
+    )
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def test_login_keeps_a_current_hash(app, signup):
+    signup("alice")
+    with app.app_context():
+        hashed_password = db.session.get(User, 1).hashed_password
+    assert hashed_password.startswith("scrypt:32768:8:1$")
+
+    client = app.test_client()
+    response = client.post("/login", json=dict(username="alice", password="password"))
+    assert response.status_code == 200, response.json
+    with app.app_context():
+        assert db.session.get(User, 1).hashed_password == hashed_password
@@ -0,0 +1,97 @@
+import pytest
+
+from splitwise.models import Expense, IdempotencyKey, UserBalance
+from splitwise.services import idempotency
+
+EXPENSE = dict(
+    amount=30, description="Dinner", category="food", split_type="EQUAL", owed_by=[2]
+)
+
+
+@pytest.fixture
+def alice(signup):
+    alice = signup("alice")
+    signup("bob")
+    return alice
+
+
+def post_expense(client, key, **overrides):
+    return client.post(
+        "/expenses", json=dict(EXPENSE, **overrides), headers={"Idempotency-Key": key}
+    )
+
+
+def test_retry_replays_stored_response(app, alice):
+    first = post_expense(alice, "k1")
+    retry = post_expense(alice, "k1")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json == first.json
+    with app.app_context():
+        assert Expense.query.count() == 1
+
+
+def test_key_reused_for_other_request_is_rejected(alice):
+    post_expense(alice, "k1")
+
+    assert post_expense(alice, "k1", amount=40).status_code == 422
+
+
+def test_failure_before_storing_response_leaves_nothing_behind(
+    app, alice, monkeypatch
+):
+    def crash(body):
+        raise RuntimeError("crashed before the response was stored")
+
+    monkeypatch.setattr(idempotency, "dumps", crash)
+    with pytest.raises(RuntimeError):
+        post_expense(alice, "k1")
+    monkeypatch.undo()
+
+    with app.app_context():
+        assert Expense.query.count() == 0
+        assert IdempotencyKey.query.count() == 0
+        assert UserBalance.query.count() == 0
+
+    retry = post_expense(alice, "k1")
+    assert retry.status_code == 200
+    with app.app_context():
+        assert Expense.query.count() == 1
+        assert IdempotencyKey.query.one().status_code == 200
+
+
+def test_failed_commit_returns_json_error(app, alice, monkeypatch):
+    def fail():
+        raise RuntimeError("lost the connection")
+
+    with app.app_context():
+        monkeypatch.setattr(idempotency.db.session, "commit", fail)
+        response = post_expense(alice, "k1")
+    monkeypatch.undo()
+
+    assert response.status_code == 500
+    assert response.json["message"] == "lost the connection"
+    with app.app_context():
+        assert Expense.query.count() == 0
+        assert IdempotencyKey.query.count() == 0
+
+
+def test_losing_a_concurrent_attempt_replays_the_winner(app, alice, monkeypatch):
+    first = post_expense(alice, "k1")
+    lookup = idempotency.stored_response
+    misses = []
+
+    def racing(*args):
+        # the first lookup runs before the concurrent attempt has committed
+        if not misses:
+            misses.append(args)
+            return None
+        return lookup(*args)
+
+    monkeypatch.setattr(idempotency, "stored_response", racing)
+    retry = post_expense(alice, "k1")
+
+    assert retry.status_code == 200
+    assert retry.json == first.json
+    with app.app_context():
+        assert Expense.query.count() == 1
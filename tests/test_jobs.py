@@ -0,0 +1,110 @@
+import datetime
+
+import pytest
+
+from splitwise.models import db, Expense, Job, LedgerEntry, SpendingRollup, UserBalance
+from splitwise.services import Worker, jobs
+from splitwise.services.expense_ingest import fan_out_expense
+
+
+@pytest.fixture
+def users(app, signup):
+    app.config["DEFER_EXPENSE_FANOUT"] = True
+    return [signup(name) for name in ("alice", "bob", "carol")]
+
+
+def add_expense(client, **kwargs):
+    expense = dict(amount=30, description="dinner", category="food", split_type="EQUAL")
+    expense.update(kwargs)
+    response = client.post("/expenses", json=expense)
+    assert response.status_code == 200, response.json
+    return response.json["data"]["id"]
+
+
+def make_due():
+    Job.query.update({Job.run_after: datetime.datetime.utcnow()})
+    db.session.commit()
+
+
+def balances():
+    return dict(db.session.query(UserBalance.user_id, UserBalance.balance))
+
+
+def test_fan_out_runs_once_for_an_expense_only_the_payer_owes(app, users):
+    alice = users[0]
+    expense_id = add_expense(alice, split_type="EXACT", owed_by=[1], split_values=[30])
+
+    with app.app_context():
+        # a redelivered job must not count the expense twice
+        for _ in range(2):
+            fan_out_expense(expense_id, [[1, 3000]])
+            db.session.commit()
+
+        rollups = SpendingRollup.query.all()
+        assert [(row.user_id, row.spent, row.expenses) for row in rollups] == [
+            (1, 3000, 1)
+        ]
+        assert db.session.get(Expense, expense_id).fanned_out
+
+
+def test_failed_job_is_retried_with_backoff(app, users, monkeypatch):
+    alice = users[0]
+    add_expense(alice, owed_by=[2, 3])
+    handler = jobs.HANDLERS["expense_fanout"]
+    calls = []
+
+    def flaky(**payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("database went away")
+        handler(**payload)
+
+    monkeypatch.setitem(jobs.HANDLERS, "expense_fanout", flaky)
+    with app.app_context():
+        assert Worker().run_once() == (0, 1)
+        job = Job.query.one()
+        assert (job.status, job.attempts) == (Job.PENDING, 1)
+        assert job.last_error == "database went away"
+        backoff = job.run_after - datetime.datetime.utcnow()
+        assert datetime.timedelta(seconds=1) < backoff <= datetime.timedelta(seconds=2)
+        # not due yet
+        assert Worker().run_once() == (0, 0)
+        assert balances() == {}
+
+        make_due()
+        assert Worker().run_once() == (1, 0)
+        assert Job.query.count() == 0
+        assert balances() == {1: 2000, 2: -1000, 3: -1000}
+
+
+def test_job_is_failed_after_max_attempts(app, users, monkeypatch):
+    alice = users[0]
+    add_expense(alice, owed_by=[2, 3])
+
+    def broken(**payload):
+        raise RuntimeError("bad payload")
+
+    monkeypatch.setitem(jobs.HANDLERS, "expense_fanout", broken)
+    worker = Worker(max_attempts=2)
+    with app.app_context():
+        for _ in range(2):
+            make_due()
+            assert worker.run_once() == (0, 1)
+
+        job = Job.query.one()
+        assert (job.status, job.attempts) == (Job.FAILED, 2)
+        make_due()
+        assert worker.run_once() == (0, 0)
+
+
+def test_deleting_an_expense_cancels_its_fan_out(app, users):
+    alice = users[0]
+    expense_id = add_expense(alice, owed_by=[2, 3])
+
+    response = alice.delete(f"/expenses/{expense_id}")
+    assert response.status_code == 200, response.json
+    with app.app_context():
+        assert Job.query.count() == 0
+        assert Worker().run_once() == (0, 0)
+        assert balances() == {}
+        assert LedgerEntry.query.count() == 0
@@ -0,0 +1,61 @@
+import datetime
+
+from splitwise.models import db, BalanceSnapshot, LedgerEntry
+from splitwise.services import append_entries, ledger_balance, take_snapshots
+from splitwise.services.ledger import SNAPSHOT_LAG
+
+
+def pay(count, amount=100):
+    """``count`` payments from user 1 to user 2, one ledger entry per user each."""
+    for _ in range(count):
+        append_entries([(1, 2, amount, None)], LedgerEntry.PAYMENT)
+    db.session.commit()
+
+
+def age_entries(by=SNAPSHOT_LAG * 2):
+    LedgerEntry.query.update({LedgerEntry.created_at: LedgerEntry.created_at - by})
+    db.session.commit()
+
+
+def test_balance_replays_snapshot_and_tail(app):
+    with app.app_context():
+        assert ledger_balance(1) is None
+
+        pay(3)
+        age_entries()
+        assert take_snapshots(min_tail=3) == 2
+        snapshot = db.session.get(BalanceSnapshot, 1)
+        assert (snapshot.balance, snapshot.last_entry_id) == (300, 6)
+
+        pay(1, amount=50)
+        assert ledger_balance(1) == 350
+        assert ledger_balance(2) == -350
+
+
+def test_snapshots_skip_short_tails(app):
+    with app.app_context():
+        pay(2)
+        age_entries()
+
+        assert take_snapshots(min_tail=3) == 0
+        assert BalanceSnapshot.query.count() == 0
+        assert ledger_balance(1) == 200
+
+
+def test_snapshots_leave_out_recent_entries(app):
+    with app.app_context():
+        pay(3)
+        age_entries()
+        # too recent: may belong to a transaction that has not committed yet
+        pay(3, amount=10)
+
+        assert take_snapshots(min_tail=3) == 2
+        snapshot = db.session.get(BalanceSnapshot, 1)
+        assert (snapshot.balance, snapshot.last_entry_id) == (300, 6)
+        assert take_snapshots(min_tail=3) == 0
+        assert ledger_balance(1) == 330
+
+        age_entries()
+        assert take_snapshots(min_tail=3) == 2
+        assert db.session.get(BalanceSnapshot, 1).balance == 330
+        assert ledger_balance(1) == 330
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from splitwise.services import cache, count_queries
+
+# statements per request, whatever the number of rows behind it
+BUDGETS = {
+    "/expenses": 3,
+    "/expenses?category=food": 3,
+    "/expenses/1": 3,
+    "/user/transactions": 2,
+    "/user/balance": 3,
+    "/user/balances/by-friend": 3,
+    "/user/settlements": 2,
+}
+
+
+@pytest.fixture
+def users(signup):
+    return [signup(name) for name in ("alice", "bob", "carol", "dave")]
+
+
+def add_activity(users, count):
+    alice, bob = users[0], users[1]
+    lines = [
+        json.dumps(
+            dict(
+                amount=9,
+                description=f"expense {i}",
+                category="food",
+                split_type="EQUAL",
+                owed_by=[2, 3, 4],
+            )
+        )
+        for i in range(count)
+    ]
+    response = alice.post(
+        "/expenses/bulk", data="\n".join(lines), content_type="application/x-ndjson"
+    )
+    assert response.json["data"]["imported"] == count
+    for _ in range(count):
+        bob.post("/transactions", json=dict(recipient_id=1, amount=1, description="p"))
+
+
+def query_count(app, client, url):
+    # start cold, so cached endpoints are measured on a miss
+    cache.init_app(app)
+    with app.app_context(), count_queries() as counter:
+        response = client.get(url)
+    assert response.status_code == 200, response.json
+    return counter
+
+
+@pytest.mark.parametrize("url", list(BUDGETS))
+def test_query_budget_does_not_grow_with_rows(app, users, url):
+    alice = users[0]
+    add_activity(users, 2)
+    few = query_count(app, alice, url)
+    add_activity(users, 40)
+    many = query_count(app, alice, url)
+
+    assert few.count <= BUDGETS[url], few.statements
+    assert many.count == few.count, many.statements
+
+
+def test_expense_statements_do_not_grow_with_members(app, signup):
+    clients = [signup(f"user{i}") for i in range(30)]
+    # warm the session epoch cache, so both requests find it filled
+    cache.init_app(app)
+    clients[0].get("/user/balance")
+    counts = []
+    for members in (3, 29):
+        with app.app_context(), count_queries() as counter:
+            response = clients[0].post(
+                "/expenses",
+                json=dict(
+                    amount=100,
+                    description="dinner",
+                    category="food",
+                    split_type="EQUAL",
+                    owed_by=list(range(2, members + 2)),
+                ),
+            )
+        assert response.status_code == 200, response.json
+        counts.append(counter)
+
+    few, many = counts
+    assert many.count == few.count, many.statements
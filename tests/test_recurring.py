@@ -0,0 +1,87 @@
+import datetime
+
+import pytest
+
+from splitwise.models import db, Expense, RecurringExpense
+from splitwise.services import create_recurring_expense, materialize_due
+from splitwise.services.recurring import MAX_CATCH_UP
+
+
+@pytest.fixture
+def users(signup):
+    return [signup(name) for name in ("alice", "bob")]
+
+
+def add_template(**kwargs):
+    template = dict(
+        amount=10,
+        description="rent",
+        category="home",
+        split_type="EQUAL",
+        owed_by=[2],
+        every=1,
+    )
+    template.update(kwargs)
+    return create_recurring_expense(1, **template)
+
+
+def expense_dates():
+    return [date for (date,) in db.session.query(Expense.date).order_by(Expense.date)]
+
+
+def test_monthly_occurrences_clamp_to_short_months(app, users):
+    with app.app_context():
+        start = datetime.date(2024, 1, 31)
+        template = add_template(frequency="MONTHLY", start_date=start)
+
+        assert materialize_due(today=datetime.date(2024, 4, 30)) == (4, 0)
+        assert expense_dates() == [
+            datetime.date(2024, 1, 31),
+            datetime.date(2024, 2, 29),
+            datetime.date(2024, 3, 31),
+            datetime.date(2024, 4, 30),
+        ]
+        # counted from the start date, so May is back on the 31st
+        assert db.session.get(RecurringExpense, template.id).next_run == (
+            datetime.date(2024, 5, 31)
+        )
+
+
+def test_overdue_template_catches_up_in_bounded_passes(app, users):
+    start = datetime.date(2024, 1, 1)
+    overdue = MAX_CATCH_UP + 9
+    progress = []
+    with app.app_context():
+        add_template(frequency="DAILY", start_date=start)
+
+        today = start + datetime.timedelta(days=overdue - 1)
+        created = materialize_due(
+            today=today, progress=lambda *counts: progress.append(counts)
+        )
+
+        assert created == (overdue, 0)
+        assert progress == [(MAX_CATCH_UP, 0), (overdue, 0)]
+        assert expense_dates() == [
+            start + datetime.timedelta(days=day) for day in range(overdue)
+        ]
+
+
+def test_occurrences_are_materialized_once(app, users):
+    with app.app_context():
+        add_template(
+            frequency="WEEKLY",
+            every=2,
+            start_date=datetime.date(2024, 1, 1),
+            end_date=datetime.date(2024, 2, 1),
+        )
+
+        today = datetime.date(2024, 1, 20)
+        assert materialize_due(today=today) == (2, 0)
+        assert materialize_due(today=today) == (0, 0)
+        assert materialize_due(today=datetime.date(2024, 6, 1)) == (1, 0)
+        assert materialize_due(today=datetime.date(2024, 6, 1)) == (0, 0)
+        assert expense_dates() == [
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 1, 15),
+            datetime.date(2024, 1, 29),
+        ]
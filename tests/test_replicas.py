@@ -0,0 +1,98 @@
+import shutil
+
+import pytest
+
+from splitwise import create_app
+from splitwise.models import db
+from splitwise.models.routing import STICKY_KEY
+from splitwise.services import cache, count_queries
+
+
+@pytest.fixture
+def app(request, tmp_path):
+    """Primary and replica SQLite files; ``False`` as param leaves out the replica."""
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    with_replica = getattr(request, "param", True)
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{primary}",
+            "SQLALCHEMY_BINDS": (
+                {"replica_0": f"sqlite:///{replica}"} if with_replica else {}
+            ),
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+            "PASSWORD_HASH_WORKERS": 0,
+            "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        }
+    )
+    cache.init_app(app)
+    with app.app_context():
+        # the replica gets its schema and data from sync_replica
+        db.create_all(bind_key=None)
+    app.sync_replica = lambda: sync(app, primary, replica)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # binds register their metadata on the shared ``db``; later apps lack them
+    db.metadatas.pop("replica_0", None)
+
+
+def sync(app, primary, replica):
+    """Bring the replica up to date with the primary."""
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    shutil.copyfile(primary, replica)
+
+
+def unpin(client):
+    with client.session_transaction() as session:
+        session.pop(STICKY_KEY, None)
+
+
+def balance(app, client):
+    with app.app_context(), count_queries(db.engines["replica_0"]) as counter:
+        response = client.get("/user/balance")
+    assert response.status_code == 200, response.json
+    return response.json["data"]["balance"], counter.count > 0
+
+
+def pay(client, amount):
+    response = client.post(
+        "/transactions", json=dict(recipient_id=2, amount=amount, description="p")
+    )
+    assert response.status_code == 200, response.json
+
+
+def test_reads_go_to_the_replica_until_the_client_writes(app, signup):
+    alice, bob = signup("alice"), signup("bob")
+    pay(alice, 10)
+    app.sync_replica()
+    unpin(alice)
+    unpin(bob)
+
+    # in sync: both users read from the replica, and alice's read is cached
+    assert balance(app, alice) == (10, True)
+    assert balance(app, bob) == (-10, True)
+
+    pay(alice, 5)
+    # the replica lags behind, so bob still sees the old balance
+    assert balance(app, bob) == (-10, True)
+    # alice is pinned to the primary and skips the cache a replica read filled
+    assert balance(app, alice) == (15, False)
+
+
+@pytest.mark.parametrize("app", [False], indirect=True)
+def test_no_pinning_without_replicas(app, signup):
+    alice, _ = signup("alice"), signup("bob")
+    pay(alice, 10)
+
+    with alice.session_transaction() as session:
+        assert STICKY_KEY not in session
+    alice.get("/user/balance")
+    misses = cache.misses
+    alice.get("/user/balance")
+    assert cache.misses == misses
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from splitwise.services import splits
+from splitwise.services.splits import InvalidSplit, compute_shares, compute_shares_batch
+
+
+def random_splits(count, seed=1):
+    """Mixed ``(split_type, amount, owed_by, split_values)``, some invalid."""
+    rnd = random.Random(seed)
+    result = []
+    for _ in range(count):
+        split_type = rnd.choice(["EQUAL", "PERCENTAGE", "EXACT"])
+        members = rnd.randint(1, 8)
+        # 10**19 is past int64, which the vectorized engine cannot hold
+        amount = rnd.choice([rnd.randint(1, 10**7), rnd.randint(1, 99), 10**17, 10**19])
+        owed_by = rnd.sample(range(1, 1000), members)
+        if split_type == "EQUAL":
+            result.append((split_type, amount, owed_by, None))
+            continue
+        if split_type == "PERCENTAGE":
+            cuts = sorted(rnd.randint(0, 10000) for _ in range(members - 1))
+            values = [(b - a) / 100 for a, b in zip([0] + cuts, cuts + [10000])]
+        else:
+            cuts = sorted(rnd.randint(0, amount) for _ in range(members - 1))
+            values = [(b - a) / 100 for a, b in zip([0] + cuts, cuts + [amount])]
+        if rnd.random() < 0.1:
+            values[0] += 1
+        if rnd.random() < 0.05:
+            values = values[:-1]
+        result.append((split_type, amount, owed_by, values))
+    result.append(("EQUAL", 2**63 + 1, [1, 2], None))
+    return result
+
+
+def normalized(results):
+    return [
+        ("error", str(result))
+        if isinstance(result, InvalidSplit)
+        else [(user_id, int(share)) for user_id, share in result]
+        for result in results
+    ]
+
+
+def one_by_one(batch):
+    results = []
+    for split in batch:
+        try:
+            results.append(compute_shares(*split))
+        except InvalidSplit as e:
+            results.append(e)
+    return results
+
+
+def test_compute_shares_rounding():
+    # the payer is the implicit first member and takes the leftover cent
+    assert compute_shares("EQUAL", 100, [2, 3]) == [(2, 33), (3, 33)]
+    assert compute_shares("PERCENTAGE", 100, [2, 3, 4], [33.33, 33.33, 33.34]) == [
+        (2, 33),
+        (3, 33),
+        (4, 34),
+    ]
+    with pytest.raises(InvalidSplit):
+        compute_shares("EXACT", 100, [2, 3], [0.5, 0.4])
+
+
+def test_scalar_batch_matches_compute_shares(monkeypatch):
+    monkeypatch.setattr(splits, "np", None)
+    batch = random_splits(2000)
+
+    assert normalized(compute_shares_batch(batch)) == normalized(one_by_one(batch))
+
+
+def test_vectorized_batch_matches_scalar(monkeypatch):
+    pytest.importorskip("numpy")
+    batch = random_splits(5000, seed=2)
+
+    vectorized = normalized(compute_shares_batch(batch))
+    monkeypatch.setattr(splits, "np", None)
+    scalar = normalized(compute_shares_batch(batch))
+
+    assert vectorized == scalar
+    assert sum(result[0] == "error" for result in scalar) > 0